@@ -3,7 +3,7 @@
 echo "🚀 Starting development environment..."
 
 # Start all services except Cypress
-docker-compose up -d db redis web celery celery-beat
+docker-compose up -d db redis web celery celery-reports celery-maintenance celery-beat
 
 # Run migrations
 echo "🔄 Running migrations..."
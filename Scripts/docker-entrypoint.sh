@@ -42,5 +42,9 @@ except:
     print("Could not update site")
 EOF
 
+# Collect static files for WhiteNoise
+echo "📦 Collecting static files..."
+python manage.py collectstatic --noinput
+
 echo "🚀 Starting application..."
-exec python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+exec gunicorn badminton_court.wsgi:application
\ No newline at end of file
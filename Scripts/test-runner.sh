@@ -37,7 +37,7 @@ docker-compose --profile test run --rm test-setup
 
 # Start Celery workers
 echo "🔄 Starting Celery workers..."
-docker-compose up -d celery celery-beat
+docker-compose up -d celery celery-reports celery-maintenance celery-beat
 
 # Check if a specific test file was provided
 if [ "$1" = "booking" ]; then
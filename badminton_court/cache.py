@@ -0,0 +1,199 @@
+# badminton_court/cache.py
+"""
+Two-tier cache backend: a small per-process memory tier in front of a shared
+tier (Redis in deployments) that every web and Celery process sees.
+
+Reads are served from the front tier when it holds the key, and otherwise
+from the shared tier, copying the value forward for FRONT_TIMEOUT seconds.
+Writes and deletes go to both tiers. Another process may therefore serve a
+value for up to FRONT_TIMEOUT seconds after it changed. Keys that must never
+lag, such as version counters and locks, are listed in SHARED_KEY_PREFIXES
+and skip the front tier.
+
+If the shared tier fails (e.g. Redis is unreachable), operations fall back to
+the front tier alone. The shared tier is retried after BACK_RETRY_INTERVAL
+seconds, so an outage does not cost a connection timeout on every call.
+"""
+
+import logging
+import time
+from functools import lru_cache
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=None)
+def outage_errors():
+    """
+    Exceptions meaning the shared cache is unreachable. Connection failures
+    only; a ValueError from incr() on a missing key and the like are answers,
+    and propagate as they would from any cache.
+    """
+    try:
+        from redis.exceptions import RedisError
+    except ImportError:
+        return (OSError,)
+    return (OSError, RedisError)
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._front_alias = options.get('FRONT', 'local')
+        self._back_alias = options.get('BACK', 'shared')
+        self._front_timeout = options.get('FRONT_TIMEOUT', 5)
+        self._shared_prefixes = tuple(options.get('SHARED_KEY_PREFIXES', ()))
+        self._retry_interval = options.get('BACK_RETRY_INTERVAL', 5)
+        self._back_down_until = 0
+
+    @cached_property
+    def front(self):
+        return caches[self._front_alias]
+
+    @cached_property
+    def back(self):
+        return caches[self._back_alias]
+
+    def _front_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self._front_timeout
+        return min(timeout, self._front_timeout)
+
+    def _cached_in_front(self, key):
+        return not key.startswith(self._shared_prefixes)
+
+    def _back_call(self, method, *args, **kwargs):
+        """
+        Run a shared tier operation, returning _MISSING when it is down or fails
+        """
+        if time.monotonic() < self._back_down_until:
+            return _MISSING
+        try:
+            return getattr(self.back, method)(*args, **kwargs)
+        except outage_errors() as e:
+            self._back_down_until = time.monotonic() + self._retry_interval
+            logger.warning(f"Shared cache unavailable, using the local cache for {self._retry_interval}s: {str(e)}")
+            return _MISSING
+
+    def get(self, key, default=None, version=None):
+        in_front = self._cached_in_front(key)
+        if in_front:
+            value = self.front.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                return value
+        value = self._back_call('get', key, _MISSING, version=version)
+        if value is _MISSING:
+            if not in_front:
+                # Shared-only keys live in the front tier only while the shared tier is down
+                return self.front.get(key, default, version=version)
+            return default
+        if in_front:
+            self.front.set(key, value, self._front_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.front.get_many([key for key in keys if self._cached_in_front(key)], version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self._back_call('get_many', missing, version=version)
+            if shared is _MISSING:
+                found.update(self.front.get_many(
+                    [key for key in missing if not self._cached_in_front(key)], version=version
+                ))
+            else:
+                found.update(shared)
+                forward = {key: value for key, value in shared.items() if self._cached_in_front(key)}
+                if forward:
+                    self.front.set_many(forward, self._front_timeout, version=version)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        stored = self._back_call('set', key, value, timeout, version=version)
+        if stored is _MISSING:
+            self.front.set(key, value, timeout, version=version)
+        elif self._cached_in_front(key):
+            self.front.set(key, value, self._front_ttl(timeout), version=version)
+        else:
+            self.front.delete(key, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._back_call('set_many', data, timeout, version=version)
+        if failed is _MISSING:
+            return self.front.set_many(data, timeout, version=version)
+        forward = {key: value for key, value in data.items() if self._cached_in_front(key) and key not in failed}
+        if forward:
+            self.front.set_many(forward, self._front_ttl(timeout), version=version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._back_call('add', key, value, timeout, version=version)
+        if added is _MISSING:
+            return self.front.add(key, value, timeout, version=version)
+        if added and self._cached_in_front(key):
+            self.front.set(key, value, self._front_ttl(timeout), version=version)
+        else:
+            self.front.delete(key, version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.front.delete(key, version=version)
+        touched = self._back_call('touch', key, timeout, version=version)
+        return False if touched is _MISSING else touched
+
+    def delete(self, key, version=None):
+        deleted_front = self.front.delete(key, version=version)
+        deleted = self._back_call('delete', key, version=version)
+        return deleted_front if deleted is _MISSING else deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.front.delete_many(keys, version=version)
+        self._back_call('delete_many', keys, version=version)
+
+    def has_key(self, key, version=None):
+        if self._cached_in_front(key) and self.front.has_key(key, version=version):
+            return True
+        found = self._back_call('has_key', key, version=version)
+        return self.front.has_key(key, version=version) if found is _MISSING else found
+
+    def incr(self, key, delta=1, version=None):
+        value = self._back_call('incr', key, delta, version=version)
+        if value is _MISSING:
+            # A missing key raises ValueError from the front tier, as from any cache
+            return self.front.incr(key, delta, version=version)
+        self.front.delete(key, version=version)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def clear(self):
+        """
+        Clear both tiers. On Redis only keys under the shared tier's key prefix
+        are removed, since the database may be shared with the Celery broker.
+        """
+        self.front.clear()
+        client = getattr(getattr(self.back, '_cache', None), 'get_client', None)
+        if client is None or not self.back.key_prefix:
+            self._back_call('clear')
+            return
+        try:
+            redis = client(write=True)
+            batch = []
+            for key in redis.scan_iter(match=f'{self.back.key_prefix}:*', count=1000):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    redis.delete(*batch)
+                    batch = []
+            if batch:
+                redis.delete(*batch)
+        except Exception as e:
+            logger.warning(f"Could not clear the shared cache: {str(e)}")
@@ -1,9 +1,18 @@
 import os
+import sys
+from pathlib import Path
 from celery import Celery
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'badminton_court.settings')
 
+# Mark worker and beat processes (started as `celery ...` or `python -m celery ...`)
+# so settings can tune their database connections apart from web processes.
+# Web processes import this module too, so the marker depends on the command.
+_command = Path(sys.argv[0]) if sys.argv and sys.argv[0] else Path()
+if _command.stem == 'celery' or _command.parent.name == 'celery':
+    os.environ.setdefault('DJANGO_PROCESS_ROLE', 'celery')
+
 app = Celery('badminton_court')
 
 # Using a string here means the worker doesn't have to serialize
@@ -0,0 +1,71 @@
+# badminton_court/sessions.py
+"""
+Cached, database-backed sessions that keep working while the cache is down.
+
+Django's cached_db store does not guard every cache call, so an unreachable
+Redis fails each request that carries a session after the socket timeout.
+This store answers from the database alone while the cache is unreachable,
+and retries the cache after SESSION_CACHE_RETRY_INTERVAL seconds, so an
+outage does not cost a timeout on every request.
+
+A session deleted during an outage (e.g. by a logout) is still cached
+and could be served again once the cache comes back. Cached sessions
+therefore expire after SESSION_CACHE_MAX_AGE seconds, which bounds that.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+from .cache import outage_errors
+
+logger = logging.getLogger(__name__)
+
+_cache_down_until = 0
+
+
+class SessionStore(CachedDBStore):
+    def _cache_call(self, method, *args):
+        """Run a cache operation, returning None while the cache is unreachable"""
+        global _cache_down_until
+        if time.monotonic() < _cache_down_until:
+            return None
+        try:
+            return getattr(self._cache, method)(*args)
+        except outage_errors() as e:
+            _cache_down_until = time.monotonic() + settings.SESSION_CACHE_RETRY_INTERVAL
+            logger.warning(f"Session cache unavailable, using the database for {settings.SESSION_CACHE_RETRY_INTERVAL}s: {str(e)}")
+            return None
+
+    def _cache_timeout(self, expiry=None):
+        return min(self.get_expiry_age(expiry=expiry), settings.SESSION_CACHE_MAX_AGE)
+
+    def load(self):
+        data = self._cache_call('get', self.cache_key)
+        if data is None:
+            session = self._get_session_from_db()
+            if not session:
+                return {}
+            data = self.decode(session.session_data)
+            self._cache_call('set', self.cache_key, data, self._cache_timeout(session.expire_date))
+        return data
+
+    def exists(self, session_key):
+        if session_key and self._cache_call('has_key', self.cache_key_prefix + session_key):
+            return True
+        return DBStore.exists(self, session_key)
+
+    def save(self, must_create=False):
+        DBStore.save(self, must_create)
+        self._cache_call('set', self.cache_key, self._session, self._cache_timeout())
+
+    def delete(self, session_key=None):
+        DBStore.delete(self, session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._cache_call('delete', self.cache_key_prefix + session_key)
@@ -10,6 +10,7 @@ from .security import *
 from .email import *
 from .social_auth import *
 from .celery import *
+from .cache import *
 from .logging import *
 
 # SSL Certificate Configuration (for Windows compatibility)
@@ -109,10 +109,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'court_management.middleware.UserRoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',  
@@ -152,6 +154,24 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# WhiteNoise serves collected static files from the app server. Outside
+# development and tests, collectstatic writes content-hashed, pre-compressed
+# (gzip and Brotli) copies that are served with far-future cache headers;
+# unhashed files are cached for WHITENOISE_MAX_AGE seconds.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+            if DEBUG or os.environ.get('RUNNING_TESTS') == 'true'
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+WHITENOISE_MAX_AGE = int(os.getenv('WHITENOISE_MAX_AGE', '3600'))
+
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -162,6 +182,42 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Site Configuration
 SITE_ID = 1
 
+# Seconds a process may serve booking conflict checks from its in-memory
+# court index before reloading it from the database
+BOOKING_INDEX_TTL = int(os.getenv('BOOKING_INDEX_TTL', '60'))
+
+# Court opening hours shown in the availability grid, and how long a court's
+# computed free/busy slots for a day stay cached between booking writes
+COURT_OPENING_HOUR = int(os.getenv('COURT_OPENING_HOUR', '6'))
+COURT_CLOSING_HOUR = int(os.getenv('COURT_CLOSING_HOUR', '22'))
+AVAILABILITY_CACHE_TTL = int(os.getenv('AVAILABILITY_CACHE_TTL', '300'))
+
+# How long a user's resolved role (Customers group membership and customer
+# profile) is cached; group and profile changes invalidate it immediately
+USER_ROLE_CACHE_TTL = int(os.getenv('USER_ROLE_CACHE_TTL', '3600'))
+
+# Lifetime of the cached dashboard counts and recent activity feed
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '60'))
+
+# Lifetime of rendered report charts; their keys are hashes of the plotted data
+CHART_CACHE_TTL = int(os.getenv('CHART_CACHE_TTL', '86400'))
+
+# Threads used to render the charts of one report concurrently
+CHART_RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', '3'))
+
+# Days back the nightly revenue rollup reconciliation recomputes; 0 rebuilds everything
+REVENUE_ROLLUP_RECONCILE_DAYS = int(os.getenv('REVENUE_ROLLUP_RECONCILE_DAYS', '90'))
+
+# Booking end notifications: emails sent per SMTP connection, and batches per task run
+BOOKING_NOTIFICATION_BATCH_SIZE = int(os.getenv('BOOKING_NOTIFICATION_BATCH_SIZE', '100'))
+BOOKING_NOTIFICATION_MAX_BATCHES = int(os.getenv('BOOKING_NOTIFICATION_MAX_BATCHES', '10'))
+
+# Booking status transitions are enqueued as timed tasks once they fall due
+# within the horizon (seconds); the periodic sweep re-applies any missed in the
+# last window seconds (0 looks back without limit)
+BOOKING_TRANSITION_HORIZON = int(os.getenv('BOOKING_TRANSITION_HORIZON', '3600'))
+BOOKING_TRANSITION_SWEEP_WINDOW = int(os.getenv('BOOKING_TRANSITION_SWEEP_WINDOW', '0'))
+
 # Poste.io configuration - using individual components like Cypress
 POSTE_PROTOCOL = os.getenv('POSTE_PROTOCOL')
 POSTE_HOSTNAME = os.getenv('POSTE_HOSTNAME')
@@ -0,0 +1,66 @@
+# badminton_court/settings/cache.py
+"""
+Cache configuration
+"""
+
+import os
+from .celery import REDIS_URL
+
+# Shared tier: Redis (CACHE_REDIS_URL, defaulting to REDIS_URL) so every web
+# and Celery process sees the same entries. Tests, and setups without Redis,
+# use one in-memory cache per process instead.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', REDIS_URL)
+CACHE_USES_REDIS = bool(CACHE_REDIS_URL) and os.environ.get('RUNNING_TESTS') != 'true'
+
+# Keys are stored as <prefix>:<version>:<key>; bump CACHE_VERSION when the
+# shape of cached values changes so a release never reads its predecessor's
+CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'badminton')
+CACHE_VERSION = int(os.getenv('CACHE_VERSION', '1'))
+
+# Per-process front tier: entries kept (least recently used are culled first)
+# and seconds an entry may lag behind a change made by another process
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', '500'))
+CACHE_LOCAL_TIMEOUT = int(os.getenv('CACHE_LOCAL_TIMEOUT', '5'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'badminton_court.cache.TwoTierCache',
+        'OPTIONS': {
+            'FRONT': 'local',
+            'BACK': 'shared',
+            'FRONT_TIMEOUT': CACHE_LOCAL_TIMEOUT,
+            # Version counters, invalidation tags and locks must never lag, nor
+            # may entries another process deletes when they go stale
+            'SHARED_KEY_PREFIXES': (
+                'booking-index:', 'tag-version:', 'task-lock:', 'booking-transition:',
+                'user-role:', 'availability:',
+            ),
+            'BACK_RETRY_INTERVAL': 5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'KEY_PREFIX': CACHE_KEY_PREFIX,
+        'VERSION': CACHE_VERSION,
+        'OPTIONS': {
+            'socket_connect_timeout': 1,
+            'socket_timeout': 1,
+        },
+    } if CACHE_USES_REDIS else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'KEY_PREFIX': CACHE_KEY_PREFIX,
+        'VERSION': CACHE_VERSION,
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local',
+        'KEY_PREFIX': CACHE_KEY_PREFIX,
+        'VERSION': CACHE_VERSION,
+        'OPTIONS': {
+            'MAX_ENTRIES': CACHE_LOCAL_MAX_ENTRIES,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
@@ -4,6 +4,8 @@ Celery configuration
 """
 
 import os
+from datetime import timedelta
+from celery.schedules import crontab
 from .base import TIME_ZONE
 
 # Celery Configuration
@@ -16,6 +18,76 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
-# These lines are for testing - makes Celery tasks run synchronously
-CELERY_TASK_ALWAYS_EAGER = True
-CELERY_TASK_EAGER_PROPAGATES = True
\ No newline at end of file
+# Tasks run synchronously in the calling process only for tests, unless
+# CELERY_TASK_ALWAYS_EAGER says otherwise; everywhere else .delay() hands
+# them to the workers through the broker
+CELERY_TASK_ALWAYS_EAGER = os.getenv(
+    'CELERY_TASK_ALWAYS_EAGER',
+    'true' if os.environ.get('RUNNING_TESTS') == 'true' else 'false'
+).lower() == 'true'
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# Queues: time-critical notifications, report generation and housekeeping
+# are consumed by separate workers (see docker-compose.yml) so a long report
+# cannot hold up notifications. Unrouted tasks go to maintenance.
+CELERY_TASK_DEFAULT_QUEUE = 'maintenance'
+CELERY_TASK_ROUTES = {
+    'court_management.tasks.check_booking_end_times': {'queue': 'notifications'},
+    'court_management.tasks.deliver_outbound_emails': {'queue': 'notifications'},
+    'court_management.tasks.update_booking_status': {'queue': 'notifications'},
+    'court_management.tasks.transition_booking_status': {'queue': 'notifications'},
+    'court_management.tasks.send_daily_report': {'queue': 'reports'},
+    'court_management.tasks.render_charts': {'queue': 'reports'},
+    'court_management.tasks.refresh_revenue_rollup_day': {'queue': 'reports'},
+    'court_management.tasks.reconcile_revenue_rollup': {'queue': 'maintenance'},
+}
+
+# Worker defaults; each queue's worker overrides concurrency and prefetch on
+# its command line. Late acks hand a task to another worker if one dies mid-run.
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(os.getenv('CELERY_WORKER_PREFETCH_MULTIPLIER', '1'))
+CELERY_TASK_ACKS_LATE = os.getenv('CELERY_TASK_ACKS_LATE', 'true').lower() == 'true'
+
+# Unacknowledged messages, including ETA'd booking transitions waiting on a
+# worker, are redelivered after this many seconds; keep it above
+# BOOKING_TRANSITION_HORIZON so a scheduled transition is not handed out twice
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'visibility_timeout': int(os.getenv('CELERY_VISIBILITY_TIMEOUT', '7200')),
+}
+
+# Periodic tasks. Each periodic task holds a distributed lock while it runs,
+# so a slow run makes the next one skip instead of overlapping.
+DAILY_REPORT_HOUR = int(os.getenv('DAILY_REPORT_HOUR', '21'))
+TASK_RUN_RETENTION_DAYS = int(os.getenv('TASK_RUN_RETENTION_DAYS', '30'))
+
+CELERY_BEAT_SCHEDULE = {
+    'update-booking-status': {
+        # Transitions run on time from their own tasks; this only catches strays
+        'task': 'court_management.tasks.update_booking_status',
+        'schedule': timedelta(minutes=5),
+    },
+    'check-booking-end-times': {
+        'task': 'court_management.tasks.check_booking_end_times',
+        'schedule': timedelta(minutes=1),
+    },
+    'send-daily-report': {
+        'task': 'court_management.tasks.send_daily_report',
+        'schedule': crontab(hour=DAILY_REPORT_HOUR, minute=0),
+    },
+    'deliver-outbound-emails': {
+        # Picks up retries; new emails trigger delivery as they are queued
+        'task': 'court_management.tasks.deliver_outbound_emails',
+        'schedule': timedelta(minutes=1),
+    },
+    'reconcile-revenue-rollup': {
+        'task': 'court_management.tasks.reconcile_revenue_rollup',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'prune-task-runs': {
+        'task': 'court_management.tasks.prune_task_runs_history',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'clear-expired-sessions': {
+        'task': 'court_management.tasks.clear_expired_sessions',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
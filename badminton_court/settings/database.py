@@ -43,14 +43,65 @@ def get_database_url():
         else:
             return database_url
 
+# Web and Celery processes are tuned separately. Celery workers and beat are
+# marked with DJANGO_PROCESS_ROLE=celery (see badminton_court/celery.py) and
+# read CELERY_<NAME> before <NAME>, e.g. CELERY_CONN_MAX_AGE over CONN_MAX_AGE.
+PROCESS_ROLE = os.getenv('DJANGO_PROCESS_ROLE', 'web')
+
+# Per-role defaults: web requests are short and many, so connections are kept
+# for a minute; workers run back-to-back tasks and keep theirs longer
+DATABASE_TUNING_DEFAULTS = {
+    'web': {'CONN_MAX_AGE': '60', 'DB_POOL_MIN_SIZE': '2', 'DB_POOL_MAX_SIZE': '8'},
+    'celery': {'CONN_MAX_AGE': '600', 'DB_POOL_MIN_SIZE': '1', 'DB_POOL_MAX_SIZE': '4'},
+}
+
+# Under ASGI every request runs sync code in a fresh thread, so a persistent
+# connection is never reused and each one stays open until it times out.
+# Web processes served by an ASGI gunicorn worker close theirs per request.
+ASGI_WORKER = 'uvicorn' in os.getenv('GUNICORN_WORKER_CLASS', '').lower()
+if ASGI_WORKER:
+    DATABASE_TUNING_DEFAULTS['web']['CONN_MAX_AGE'] = '0'
+
+def database_setting(name, default=None):
+    """
+    Returns a database tuning value from the environment for this process role
+    """
+    if PROCESS_ROLE == 'celery' and f'CELERY_{name}' in os.environ:
+        return os.environ[f'CELERY_{name}']
+    return os.getenv(name, DATABASE_TUNING_DEFAULTS.get(PROCESS_ROLE, {}).get(name, default))
+
+# Seconds a connection is reused across requests or tasks (0 closes it after
+# each one), and whether a reused connection is checked before use
+CONN_MAX_AGE = int(database_setting('CONN_MAX_AGE'))
+CONN_HEALTH_CHECKS = database_setting('CONN_HEALTH_CHECKS', 'true').lower() == 'true'
+
+# Optional connection pool (DB_POOL=true) from the psycopg 3 driver, installed
+# with its pool extra from requirements.txt; Django uses psycopg 3 over
+# psycopg2 when both are present. Pooled connections replace persistent ones,
+# so CONN_MAX_AGE is forced to 0 with the pool on.
+DB_POOL = database_setting('DB_POOL', 'false').lower() == 'true'
+DB_POOL_MIN_SIZE = int(database_setting('DB_POOL_MIN_SIZE'))
+DB_POOL_MAX_SIZE = int(database_setting('DB_POOL_MAX_SIZE'))
+DB_POOL_TIMEOUT = int(database_setting('DB_POOL_TIMEOUT', '10'))
+
 DATABASE_URL = get_database_url()
 
 if DATABASE_URL.startswith('postgres'):
     # PostgreSQL configuration
     import dj_database_url
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL)
+        'default': dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=0 if DB_POOL else CONN_MAX_AGE,
+            conn_health_checks=CONN_HEALTH_CHECKS,
+        )
     }
+    if DB_POOL:
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
 else:
     # SQLite configuration
     DATABASES = {
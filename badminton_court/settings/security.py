@@ -5,8 +5,9 @@ Security and authentication configuration
 
 import os
 import re
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ImproperlyConfigured, ValidationError
 from .base import DEBUG
+from .cache import CACHE_USES_REDIS
 
 # Authentication Configuration
 AUTHENTICATION_BACKENDS = [
@@ -64,6 +65,38 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
     SECURE_SSL_REDIRECT = True
 
+# Sessions: cached_db (the default with Redis) serves sessions from the
+# shared cache and only writes the database when one changes, falling back
+# to the database while Redis is down; without Redis the shared tier is
+# per-process, so db is the default. signed_cookies keeps them in the
+# browser with no server-side storage. A full engine path is accepted too.
+SESSION_ENGINES = {
+    'cached_db': 'badminton_court.sessions',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'cached_db' if CACHE_USES_REDIS else 'db')
+if SESSION_ENGINE in SESSION_ENGINES:
+    SESSION_ENGINE = SESSION_ENGINES[SESSION_ENGINE]
+elif '.' not in SESSION_ENGINE:
+    raise ImproperlyConfigured(
+        f"Unknown SESSION_ENGINE {SESSION_ENGINE!r}: use one of {', '.join(SESSION_ENGINES)} or a full engine path"
+    )
+# The shared tier only: a logout must not linger in another process's front tier
+SESSION_CACHE_ALIAS = 'shared'
+# Seconds before an unreachable session cache is tried again
+SESSION_CACHE_RETRY_INTERVAL = int(os.getenv('SESSION_CACHE_RETRY_INTERVAL', '5'))
+# Longest a session stays cached, bounding how long one deleted while the
+# cache was down can be served again once it is back
+SESSION_CACHE_MAX_AGE = int(os.getenv('SESSION_CACHE_MAX_AGE', '3600'))
+# Expired sessions deleted per statement by the nightly cleanup task
+SESSION_CLEANUP_BATCH_SIZE = int(os.getenv('SESSION_CLEANUP_BATCH_SIZE', '1000'))
+
+# Flash messages travel in a signed cookie instead of the session, so
+# messages.success() after a form post does not write the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 # Admin user settings
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')
 ADMIN_FIRST_NAME = os.getenv('ADMIN_FIRST_NAME')
@@ -26,5 +26,7 @@ aeropace.com"""
         return self._render_mail(subject, message, email, headers)
     
     def _render_mail(self, subject, message, email, headers):
-        from django.core.mail import EmailMessage
-        return EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [email], headers=headers)
\ No newline at end of file
+        # send() queues the message in the outbox instead of talking to the
+        # mail server during the request
+        from court_management.components.services import OutboxEmailMessage
+        return OutboxEmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [email], headers=headers)
\ No newline at end of file
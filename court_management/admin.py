@@ -17,12 +17,10 @@ class CustomerAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         # If user is customer, only show their own profile
-        if request.user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=request.user)
-                return qs.filter(id=customer.id)
-            except Customer.DoesNotExist:
+        if request.is_customer:
+            if request.customer is None:
                 return qs.none()
+            return qs.filter(id=request.customer.pk)
         return qs
     
     def has_view_permission(self, request, obj=None):
@@ -31,7 +29,7 @@ class CustomerAdmin(admin.ModelAdmin):
             return False
         
         # If user is customer, they can only view their own profile
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             if obj and hasattr(obj, 'user') and obj.user != request.user:
                 return False
         
@@ -43,7 +41,7 @@ class CustomerAdmin(admin.ModelAdmin):
             return False
         
         # If user is customer, they can only change their own profile
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             if obj and hasattr(obj, 'user') and obj.user != request.user:
                 return False
         
@@ -51,7 +49,7 @@ class CustomerAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         # Customers cannot delete their profile
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         
         return super().has_delete_permission(request, obj)
@@ -64,13 +62,13 @@ class CourtAdmin(admin.ModelAdmin):
     
     def has_view_permission(self, request, obj=None):
         # Only staff and admin can view courts
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_view_permission(request, obj)
     
     def has_change_permission(self, request, obj=None):
         # Only staff and admin can change courts
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_change_permission(request, obj)
     
@@ -90,12 +88,10 @@ class BookingAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         # If user is customer, only show their bookings
-        if request.user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=request.user)
-                return qs.filter(customer=customer)
-            except Customer.DoesNotExist:
+        if request.is_customer:
+            if request.customer is None:
                 return qs.none()
+            return qs.filter(customer=request.customer)
         return qs
     
     def has_view_permission(self, request, obj=None):
@@ -104,7 +100,7 @@ class BookingAdmin(admin.ModelAdmin):
             return False
         
         # If user is customer, they can only view their own bookings
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             if obj and hasattr(obj, 'customer') and hasattr(obj.customer, 'user') and obj.customer.user != request.user:
                 return False
         
@@ -116,7 +112,7 @@ class BookingAdmin(admin.ModelAdmin):
             return False
         
         # If user is customer, they can only change their own bookings
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             if obj and hasattr(obj, 'customer') and hasattr(obj.customer, 'user') and obj.customer.user != request.user:
                 return False
         
@@ -128,7 +124,7 @@ class BookingAdmin(admin.ModelAdmin):
             return False
         
         # If user is customer, they cannot delete bookings
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         
         # If booking is paid, only admin can delete it
@@ -151,13 +147,13 @@ class EmployeeAdmin(admin.ModelAdmin):
     
     def has_view_permission(self, request, obj=None):
         # Only staff and admin can view employees
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_view_permission(request, obj)
     
     def has_change_permission(self, request, obj=None):
         # Only staff and admin can change employees
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_change_permission(request, obj)
     
@@ -176,13 +172,13 @@ class WorkScheduleAdmin(admin.ModelAdmin):
     
     def has_view_permission(self, request, obj=None):
         # Only staff and admin can view work schedules
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_view_permission(request, obj)
     
     def has_change_permission(self, request, obj=None):
         # Only staff and admin can change work schedules
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_change_permission(request, obj)
     
@@ -201,13 +197,13 @@ class TimeEntryAdmin(admin.ModelAdmin):
     
     def has_view_permission(self, request, obj=None):
         # Only staff and admin can view time entries
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_view_permission(request, obj)
     
     def has_change_permission(self, request, obj=None):
         # Only staff and admin can change time entries
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_change_permission(request, obj)
     
@@ -226,13 +222,13 @@ class PaymentAdmin(admin.ModelAdmin):
     
     def has_view_permission(self, request, obj=None):
         # Only staff and admin can view payments
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_view_permission(request, obj)
     
     def has_change_permission(self, request, obj=None):
         # Only staff and admin can change payments
-        if request.user.groups.filter(name='Customers').exists():
+        if request.is_customer:
             return False
         return super().has_change_permission(request, obj)
     
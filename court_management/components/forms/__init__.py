@@ -1,5 +1,5 @@
 # court_management/components/forms/__init__.py
-from .bookings import BookingForm
+from .bookings import BookingForm, BookingFilterForm
 from .courts import CourtForm
 from .customers import CustomerForm
 from .employees import EmployeeForm
@@ -4,6 +4,7 @@ from django import forms
 from ..models import (
     Booking, Customer, Court, TimeEntry
 )
+from ..services import booking_index, get_user_role
 
 class BookingForm(forms.ModelForm):
     class Meta:
@@ -20,14 +21,11 @@ class BookingForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # If user is a customer, hide or disable the customer field
-        if user and user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=user)
-                self.fields['customer'].queryset = Customer.objects.filter(id=customer.id)
-                self.fields['customer'].initial = customer
-                self.fields['customer'].widget = forms.HiddenInput()
-            except Customer.DoesNotExist:
-                pass
+        role = get_user_role(user)
+        if role.is_customer and role.customer is not None:
+            self.fields['customer'].queryset = Customer.objects.filter(id=role.customer.pk)
+            self.fields['customer'].initial = role.customer
+            self.fields['customer'].widget = forms.HiddenInput()
         
         # Filter courts to only show active ones
         self.fields['court'].queryset = Court.objects.filter(active=True)
@@ -42,21 +40,14 @@ class BookingForm(forms.ModelForm):
             if start_time >= end_time:
                 raise forms.ValidationError("End time must be after start time.")
             
-            # *** THIS IS THE FIX ***
-            # Check for overlapping bookings, including 'pending' ones
-            overlapping_bookings = Booking.objects.filter(
-                court=court,
-                start_time__lt=end_time,
-                end_time__gt=start_time,
-                status__in=['pending', 'confirmed', 'in_progress']  # <-- ADD 'pending' HERE
+            # Check for overlapping active bookings (pending, confirmed, in progress)
+            # against the in-memory court index instead of querying the database
+            conflicting_booking = booking_index.find_conflict(
+                court.pk, start_time, end_time, exclude_pk=self.instance.pk
             )
             
-            if self.instance:
-                overlapping_bookings = overlapping_bookings.exclude(pk=self.instance.pk)
-            
-            if overlapping_bookings.exists():
+            if conflicting_booking:
                 # Provide a more helpful error message
-                conflicting_booking = overlapping_bookings.first()
                 raise forms.ValidationError(
                     f"This court is already booked from {conflicting_booking.start_time.strftime('%Y-%m-%d %H:%M')} "
                     f"to {conflicting_booking.end_time.strftime('%Y-%m-%d %H:%M')}. "
@@ -65,6 +56,28 @@ class BookingForm(forms.ModelForm):
         
         return cleaned_data
 
+class BookingFilterForm(forms.Form):
+    court = forms.ModelChoiceField(
+        queryset=Court.objects.filter(active=True), required=False, empty_label='All courts',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    status = forms.ChoiceField(
+        choices=[('', 'All statuses')] + Booking.STATUS_CHOICES, required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("The start date must not be after the end date.")
+        
+        return cleaned_data
+
 # Separate TimeEntry form
 class TimeEntryForm(forms.ModelForm):
     class Meta:
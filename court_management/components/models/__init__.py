@@ -1,8 +1,11 @@
 # court_management/components/models/__init__.py
-from .booking import Booking
+from .booking import Booking, BookingConflictError, bookings_updated
 from .court import Court
 from .customer import Customer
 from .employee import Employee
 from .payment import Payment
 from .timeEntry import TimeEntry
-from .workSchedule import WorkSchedule
\ No newline at end of file
+from .workSchedule import WorkSchedule
+from .dailyRevenueRollup import DailyRevenueRollup
+from .outboundEmail import OutboundEmail
+from .taskRun import TaskRun
\ No newline at end of file
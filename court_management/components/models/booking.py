@@ -1,9 +1,93 @@
 # court_management/components/models/Booking.py
 
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, connections, transaction, IntegrityError
+from django.db.models import F
+from django.dispatch import Signal
 from django.utils import timezone
 from django.urls import reverse
 
+# Name of the PostgreSQL exclusion constraint (migration 0003) that keeps
+# active bookings on the same court from overlapping
+BOOKING_OVERLAP_CONSTRAINT = 'booking_no_overlap'
+
+
+class BookingConflictError(ValueError):
+    """Raised when a booking would overlap an active booking on the same court"""
+    
+    def __init__(self, message="This court is already booked for the selected time. Please choose a different time or court."):
+        super().__init__(message)
+
+
+# Fields whose change takes or frees a slot on a court
+SLOT_FIELDS = frozenset({'court', 'court_id', 'start_time', 'end_time', 'status'})
+
+# Sent after a queryset update() of SLOT_FIELDS, which bypasses save() and
+# post_save, with the ids of the courts the rows were on before and after
+bookings_updated = Signal()
+
+
+class BookingQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        if not SLOT_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        
+        court_ids = set(self.order_by().values_list('court_id', flat=True).distinct())
+        court = kwargs.get('court', kwargs.get('court_id'))
+        if isinstance(court, models.Model):
+            court = court.pk
+        if isinstance(court, int):
+            court_ids.add(court)
+        
+        rows = super().update(**kwargs)
+        if rows:
+            bookings_updated.send(sender=self.model, court_ids=court_ids)
+        return rows
+
+
+class BookingManager(models.Manager.from_queryset(BookingQuerySet)):
+    def reserve(self, court, start_time, end_time, customer, **fields):
+        """
+        Create a booking for the slot in a single atomic step, raising
+        BookingConflictError when it overlaps an active booking on the court.
+        
+        On PostgreSQL the insert alone is enough: the exclusion constraint
+        rejects overlaps. Other databases serialize reservations per court by
+        write-locking the court row before checking and inserting.
+        """
+        if start_time >= end_time:
+            raise ValueError("End time must be after start time.")
+        
+        if 'fee' not in fields:
+            hours = Decimal((end_time - start_time).total_seconds()) / Decimal(3600)
+            fields['fee'] = (court.hourly_rate * hours).quantize(Decimal('0.01'))
+        
+        booking = self.model(
+            court=court, customer=customer,
+            start_time=start_time, end_time=end_time,
+            **fields
+        )
+        
+        with transaction.atomic(using=self.db):
+            if connections[self.db].vendor != 'postgresql':
+                # No-op write on the court row: a row lock on MySQL/MariaDB and
+                # the database write lock on SQLite, held until commit
+                type(court)._default_manager.using(self.db).filter(pk=court.pk).update(active=F('active'))
+                
+                if booking.status in Booking.ACTIVE_STATUSES and self.filter(
+                    court=court,
+                    start_time__lt=end_time,
+                    end_time__gt=start_time,
+                    status__in=Booking.ACTIVE_STATUSES,
+                ).exists():
+                    raise BookingConflictError()
+            
+            booking.save(using=self.db, force_insert=True)
+        
+        return booking
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -13,6 +97,9 @@ class Booking(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
+    # Statuses that occupy a court; bookings in any other status free the slot
+    ACTIVE_STATUSES = ('pending', 'confirmed', 'in_progress')
+    
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('paid', 'Paid'),
@@ -31,6 +118,8 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BookingManager()
+    
     class Meta:
         permissions = [
             ("view_all_bookings", "Can view all bookings"),
@@ -38,13 +127,50 @@ class Booking(models.Model):
             ("cancel_any_booking", "Can cancel any booking"),
             ("process_any_payment", "Can process any payment"),
         ]
+        indexes = [
+            # Overlap checks, availability and per-court listings
+            models.Index(fields=['court', 'start_time', 'end_time', 'status'], name='booking_court_time_idx'),
+            # Status transitions sweep by status and end time
+            models.Index(fields=['status', 'end_time'], name='booking_status_end_idx'),
+            # End-of-booking notifications only ever look at unnotified bookings in progress
+            models.Index(
+                fields=['end_time'],
+                condition=models.Q(status='in_progress', notified=False),
+                name='booking_end_unnotified_idx',
+            ),
+            # Date range reports and day listings
+            models.Index(fields=['start_time'], name='booking_start_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.customer.name} - {self.court.name} ({self.start_time})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the stored values so write signals can tell what changed
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
     def get_absolute_url(self):
         return reverse('booking-detail', args=[self.id])
     
+    def save(self, *args, **kwargs):
+        # Surface exclusion constraint violations as a booking conflict so every
+        # write path (admin, views, management commands) reports it the same way
+        try:
+            with transaction.atomic(using=kwargs.get('using')):
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            if BOOKING_OVERLAP_CONSTRAINT in str(e):
+                raise BookingConflictError() from e
+            raise
+        
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+    
     def duration_hours(self):
         return (self.end_time - self.start_time).total_seconds() / 3600
     
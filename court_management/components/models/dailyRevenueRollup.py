@@ -0,0 +1,34 @@
+# court_management/components/models/DailyRevenueRollup.py
+
+from django.db import models
+
+class DailyRevenueRollup(models.Model):
+    """
+    Pre-aggregated revenue for one day, court and payment method.
+
+    Rows with a blank payment_method hold the booking totals for the day and
+    court; the others hold the payments taken with that method. Bookings and
+    their payments count towards the local date the booking starts on.
+    """
+    BOOKING_TOTALS = ''
+    
+    date = models.DateField()
+    court = models.ForeignKey('Court', on_delete=models.CASCADE)
+    payment_method = models.CharField(max_length=10, blank=True)
+    bookings_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    booking_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    payments_count = models.PositiveIntegerField(default=0)
+    payment_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'court', 'payment_method'],
+                name='daily_revenue_rollup_unique',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - {self.court_id} - {self.payment_method or 'bookings'}"
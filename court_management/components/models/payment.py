@@ -25,6 +25,11 @@ class Payment(models.Model):
             ("manage_any_payment", "Can manage any payment"),
             ("process_refunds", "Can process refunds"),
         ]
+        indexes = [
+            # Payments of a booking by method, for the revenue rollup; the
+            # booking foreign key already has its own single-column index
+            models.Index(fields=['booking', 'payment_method'], name='payment_booking_method_idx'),
+        ]
     
     def __str__(self):
         return f"{self.booking} - {self.amount}"
\ No newline at end of file
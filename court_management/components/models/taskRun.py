@@ -0,0 +1,27 @@
+# court_management/components/models/TaskRun.py
+
+from django.db import models
+
+class TaskRun(models.Model):
+    """One execution of a periodic task, recorded by services.task_runs.tracked_task_run"""
+    STATUS_CHOICES = [
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+    
+    task_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    started_at = models.DateTimeField()
+    duration = models.FloatField(default=0, help_text="Seconds")
+    rows_touched = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['task_name', 'started_at'], name='task_run_name_started_idx'),
+            models.Index(fields=['started_at'], name='task_run_started_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task_name} {self.status} at {self.started_at} ({self.duration:.2f}s, {self.rows_touched} rows)"
@@ -1,5 +1,7 @@
 # court_management/components/models/TimeEntry.py
 
+from decimal import Decimal
+
 from django.db import models
 
 class TimeEntry(models.Model):
@@ -14,6 +16,16 @@ class TimeEntry(models.Model):
             ("manage_any_time_entry", "Can manage any time entry"),
             ("use_time_clock", "Can use time clock system"),
         ]
+        indexes = [
+            # Payroll and schedules read an employee's entries by clock-in time
+            models.Index(fields=['employee', 'clock_in'], name='timeentry_employee_in_idx'),
+            # Clocking in and out looks up the employee's open entry
+            models.Index(
+                fields=['employee'],
+                condition=models.Q(clock_out__isnull=True),
+                name='timeentry_open_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.employee.name} - {self.clock_in}"
@@ -24,5 +36,8 @@ class TimeEntry(models.Model):
         return 0
     
     def calculate_pay(self):
-        return self.duration_hours() * self.employee.hourly_rate
+        if self.clock_out:
+            hours = Decimal((self.clock_out - self.clock_in).total_seconds()) / 3600
+            return (hours * self.employee.hourly_rate).quantize(Decimal('0.01'))
+        return Decimal('0.00')
  
\ No newline at end of file
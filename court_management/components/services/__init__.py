@@ -0,0 +1,12 @@
+# court_management/components/services/__init__.py
+from .dates import start_of_day, month_bounds, day_range, date_range, month_range, range_lookup
+from .booking_index import booking_index
+from .availability import court_availability, invalidate_availability
+from .roles import get_user_role, invalidate_user_role, invalidate_all_user_roles
+from .dashboard import get_dashboard_stats, invalidate_dashboard_stats
+from .charts import chart_spec, register_charts, get_chart_image
+from .revenue import refresh_revenue_rollup, schedule_revenue_rollup_refresh, rebuild_revenue_rollup, revenue_summary
+from .outbox import enqueue_email, enqueue_message, OutboxEmailMessage
+from .task_runs import task_lock, tracked_task_run, prune_task_runs
+from .booking_transitions import schedule_booking_transitions, apply_booking_transition, sweep_booking_transitions
+from .cache_tags import model_tag, tag_versions, versioned_key, tagged_key, tagged_keys, invalidate_tags
@@ -0,0 +1,135 @@
+# court_management/components/services/availability.py
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Booking, Court
+from .cache_tags import invalidate_tags, model_tag, tag_versions, versioned_key
+
+# Every court's availability is dropped by court changes, or on demand via 'availability'
+AVAILABILITY_TAGS = ('availability', model_tag(Court))
+
+
+def _cache_key(court_id, day):
+    return f'availability:{court_id}:{day.isoformat()}'
+
+
+def _court_tag(court_id):
+    # Booking writes drop the availability of their court only
+    return f'availability:court:{court_id}'
+
+
+def _court_tags(court_id):
+    return AVAILABILITY_TAGS + (_court_tag(court_id),)
+
+
+def _day_window(day):
+    """Opening and closing datetimes of a calendar day in the current timezone"""
+    tz = timezone.get_current_timezone()
+    opens = timezone.make_aware(datetime.combine(day, time(settings.COURT_OPENING_HOUR)), tz)
+    if settings.COURT_CLOSING_HOUR >= 24:
+        closes = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz)
+    else:
+        closes = timezone.make_aware(datetime.combine(day, time(settings.COURT_CLOSING_HOUR)), tz)
+    return opens, closes
+
+
+def _sweep(intervals, opens, closes):
+    """
+    Merge sorted (start, end) intervals clipped to [opens, closes) into busy
+    blocks and return them with the free gaps between them.
+    """
+    busy = []
+    for start, end in intervals:
+        start, end = max(start, opens), min(end, closes)
+        if start >= end:
+            continue
+        if busy and start <= busy[-1][1]:
+            busy[-1][1] = max(busy[-1][1], end)
+        else:
+            busy.append([start, end])
+    
+    free = []
+    cursor = opens
+    for start, end in busy:
+        if start > cursor:
+            free.append((cursor, start))
+        cursor = end
+    if cursor < closes:
+        free.append((cursor, closes))
+    
+    return {'busy': [tuple(block) for block in busy], 'free': free}
+
+
+def court_availability(start_date, days=1):
+    """
+    Free/busy slots of every active court for `days` days from `start_date`.
+    
+    Each court/day is cached and invalidated on booking writes; missing
+    entries are computed together from one range query over Booking and
+    stored under the tag versions read before the query, so a result that
+    raced an invalidation is never served.
+    Returns a list of {'court': Court, 'days': [{'date', 'busy', 'free'}]}.
+    """
+    courts = list(Court.objects.filter(active=True).order_by('name'))
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+    
+    versions = tag_versions({tag for court in courts for tag in _court_tags(court.pk)})
+    keys = {
+        (court.pk, day): versioned_key(_cache_key(court.pk, day), _court_tags(court.pk), versions)
+        for court in courts for day in dates
+    }
+    cached = cache.get_many(keys.values())
+    missing = [slot for slot, key in keys.items() if key not in cached]
+    
+    if missing:
+        computed = {keys[slot]: value for slot, value in _compute(missing).items()}
+        cached.update(computed)
+        cache.set_many(computed, timeout=settings.AVAILABILITY_CACHE_TTL)
+    
+    return [
+        {
+            'court': court,
+            'days': [
+                dict(date=day, **cached[keys[(court.pk, day)]])
+                for day in dates
+            ],
+        }
+        for court in courts
+    ]
+
+
+def _compute(slots):
+    court_ids = {court_id for court_id, _ in slots}
+    window_start = _day_window(min(day for _, day in slots))[0]
+    window_end = _day_window(max(day for _, day in slots))[1]
+    
+    intervals = {court_id: [] for court_id in court_ids}
+    bookings = Booking.objects.filter(
+        court_id__in=court_ids,
+        status__in=Booking.ACTIVE_STATUSES,
+        start_time__lt=window_end,
+        end_time__gt=window_start,
+    ).order_by('court_id', 'start_time').values_list('court_id', 'start_time', 'end_time')
+    for court_id, start, end in bookings:
+        intervals[court_id].append((start, end))
+    
+    computed = {}
+    for court_id, day in slots:
+        opens, closes = _day_window(day)
+        computed[(court_id, day)] = _sweep(intervals[court_id], opens, closes)
+    return computed
+
+
+def invalidate_availability(*court_ids):
+    """
+    Drop the cached availability of the courts once the current transaction
+    commits; until then a recomputation would still read the old bookings.
+    """
+    tags = {_court_tag(court_id) for court_id in court_ids if court_id is not None}
+    if tags:
+        transaction.on_commit(lambda: invalidate_tags(*tags))
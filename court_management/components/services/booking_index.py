@@ -0,0 +1,248 @@
+# court_management/components/services/booking_index.py
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Booking
+
+Interval = namedtuple('Interval', ['start_time', 'end_time', 'booking_id'])
+
+# Bookings that ended longer ago than this are not loaded into the index;
+# lookups reaching further back are answered by the database instead.
+INDEX_HORIZON = timedelta(days=1)
+
+
+def _version_key(court_id):
+    return f'booking-index:version:{court_id}'
+
+
+class CourtIntervals:
+    """
+    Sorted intervals of the active bookings on one court.
+
+    Intervals are kept ordered by start time alongside a prefix table holding
+    the two intervals with the latest end times seen so far. A conflict check
+    is then a single bisect over the start times plus a constant-time look at
+    the prefix table, whether or not legacy data contains overlaps.
+    """
+
+    def __init__(self, intervals, horizon, version):
+        self.horizon = horizon
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self._intervals = sorted(intervals)
+        self._starts = [interval.start_time for interval in self._intervals]
+        self._by_id = {interval.booking_id: interval for interval in self._intervals}
+        self._latest = []
+        self._rebuild_from(0)
+
+    def _rebuild_from(self, start):
+        # Entries before start only refer to intervals before start, which an
+        # insert or removal at start leaves in place
+        del self._latest[start:]
+        best, second = self._latest[start - 1] if start else (None, None)
+        for index in range(start, len(self._intervals)):
+            interval = self._intervals[index]
+            if best is None or interval.end_time > self._intervals[best].end_time:
+                best, second = index, best
+            elif second is None or interval.end_time > self._intervals[second].end_time:
+                second = index
+            self._latest.append((best, second))
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def add(self, interval):
+        self.remove(interval.booking_id)
+        index = bisect_right(self._intervals, interval)
+        self._intervals.insert(index, interval)
+        self._starts.insert(index, interval.start_time)
+        self._by_id[interval.booking_id] = interval
+        self._rebuild_from(index)
+
+    def remove(self, booking_id):
+        interval = self._by_id.pop(booking_id, None)
+        if interval is None:
+            return
+        index = bisect_left(self._intervals, interval)
+        del self._intervals[index]
+        del self._starts[index]
+        self._rebuild_from(index)
+
+    def find_conflict(self, start_time, end_time, exclude_pk=None):
+        # Every candidate starts before the requested end; among them only the
+        # one finishing last (skipping the booking being edited) can matter.
+        candidates = bisect_left(self._starts, end_time)
+        if not candidates:
+            return None
+        for index in self._latest[candidates - 1]:
+            if index is None:
+                return None
+            interval = self._intervals[index]
+            if interval.booking_id == exclude_pk:
+                continue
+            return interval if interval.end_time > start_time else None
+        return None
+
+
+class BookingIndex:
+    """
+    Process-wide registry of per-court interval indexes.
+
+    Courts are loaded lazily with one query and kept current by the Booking
+    save/delete signals once their transaction commits. Writes also bump a
+    per-court version in the cache so other processes sharing that cache
+    reload the court on their next lookup; BOOKING_INDEX_TTL bounds staleness
+    when the cache is not shared.
+    """
+
+    def __init__(self):
+        self._courts = {}
+        self._lock = threading.Lock()
+
+    def _load(self, court_id, version):
+        horizon = timezone.now() - INDEX_HORIZON
+        rows = Booking.objects.filter(
+            court_id=court_id,
+            status__in=Booking.ACTIVE_STATUSES,
+            end_time__gt=horizon,
+        ).values_list('start_time', 'end_time', 'id')
+        return CourtIntervals([Interval(*row) for row in rows], horizon, version)
+
+    def _get(self, court_id):
+        version = cache.get(_version_key(court_id), 0)
+        ttl = getattr(settings, 'BOOKING_INDEX_TTL', 60)
+        with self._lock:
+            current = self._courts.get(court_id)
+            if (current is not None and current.version == version
+                    and time.monotonic() - current.loaded_at <= ttl):
+                return current
+        # Queried outside the lock so lookups on other courts are not held up
+        intervals = self._load(court_id, version)
+        with self._lock:
+            current = self._courts.get(court_id)
+            # Unless a write committed meanwhile has already moved the court on
+            if (current is None or current.version <= version
+                    or time.monotonic() - current.loaded_at > ttl):
+                self._courts[court_id] = intervals
+        return intervals
+
+    def find_conflict(self, court_id, start_time, end_time, exclude_pk=None):
+        """
+        Return the Interval of an active booking on the court overlapping
+        [start_time, end_time), or None when the slot is free.
+        """
+        intervals = self._get(court_id)
+        if end_time > intervals.horizon:
+            with self._lock:
+                conflict = intervals.find_conflict(start_time, end_time, exclude_pk)
+            if conflict or start_time >= intervals.horizon:
+                return conflict
+
+        # The requested slot reaches past the indexed window, ask the database
+        overlapping = Booking.objects.filter(
+            court_id=court_id,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+            status__in=Booking.ACTIVE_STATUSES,
+        )
+        if exclude_pk is not None:
+            overlapping = overlapping.exclude(pk=exclude_pk)
+        row = overlapping.order_by('start_time').values_list('start_time', 'end_time', 'id').first()
+        return Interval(*row) if row else None
+
+    def booking_saved(self, booking, previous_court_id=None):
+        """
+        Record a saved booking once its transaction commits, so a rolled-back
+        save leaves nothing behind. previous_court_id is the court the booking
+        was on before the save, whose index must drop it as well.
+        """
+        court_id = booking.court_id
+        interval = Interval(booking.start_time, booking.end_time, booking.pk)
+        active = booking.status in Booking.ACTIVE_STATUSES
+        transaction.on_commit(lambda: self._apply_saved(court_id, previous_court_id, interval, active))
+
+    def booking_deleted(self, booking):
+        court_id, booking_id = booking.court_id, booking.pk
+        transaction.on_commit(lambda: self._apply_deleted(court_id, booking_id))
+
+    def courts_changed(self, *court_ids):
+        """
+        Reload the courts once the transaction commits, after a write that
+        bypassed save() and so did not say which bookings changed.
+        """
+        transaction.on_commit(lambda: self._apply_courts_changed(court_ids))
+
+    def _advance(self, court_id, version):
+        """
+        Move a loaded court to the version this process's write bumped it to
+        and return it, or drop it and return None when another process bumped
+        it as well, since its write is not in the local intervals. Call with
+        the lock held.
+        """
+        intervals = self._courts.get(court_id)
+        if intervals is None:
+            return None
+        if intervals.version + 1 != version:
+            del self._courts[court_id]
+            return None
+        intervals.version = version
+        return intervals
+
+    def _apply_saved(self, court_id, previous_court_id, interval, active):
+        version = self._bump_version(court_id)
+        moved = previous_court_id is not None and previous_court_id != court_id
+        # Other processes must drop the booking from the court it left too
+        previous_version = self._bump_version(previous_court_id) if moved else None
+        with self._lock:
+            for other_court_id, intervals in self._courts.items():
+                if other_court_id != court_id:
+                    intervals.remove(interval.booking_id)
+            if moved:
+                self._advance(previous_court_id, previous_version)
+            intervals = self._advance(court_id, version)
+            if intervals is None:
+                return
+            if active and interval.end_time > intervals.horizon:
+                intervals.add(interval)
+            else:
+                intervals.remove(interval.booking_id)
+
+    def _apply_deleted(self, court_id, booking_id):
+        version = self._bump_version(court_id)
+        with self._lock:
+            intervals = self._advance(court_id, version)
+            if intervals is not None:
+                intervals.remove(booking_id)
+
+    def _apply_courts_changed(self, court_ids):
+        for court_id in court_ids:
+            self._bump_version(court_id)
+        with self._lock:
+            for court_id in court_ids:
+                self._courts.pop(court_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._courts.clear()
+
+    def _bump_version(self, court_id):
+        key = _version_key(court_id)
+        cache.add(key, 0, timeout=None)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # The key was evicted between add() and incr()
+            cache.set(key, 1, timeout=None)
+            return 1
+
+
+booking_index = BookingIndex()
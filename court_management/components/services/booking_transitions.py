@@ -0,0 +1,113 @@
+# court_management/components/services/booking_transitions.py
+
+import logging
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Booking
+
+logger = logging.getLogger(__name__)
+
+# Status a booking moves to, the time field at which it does, and the statuses
+# it moves from. A confirmed booking whose slot passed without it starting is
+# left confirmed for staff to resolve, as the status poll always did.
+TRANSITIONS = {
+    'in_progress': ('start_time', ('confirmed',)),
+    'completed': ('end_time', ('in_progress',)),
+}
+
+
+def _stamp(when):
+    # Normalised to UTC so a time read back from the database matches the one scheduled
+    return when.astimezone(dt_timezone.utc).isoformat()
+
+
+def schedule_booking_transitions(booking):
+    """
+    Enqueue a task timed for each status change of the booking that falls due
+    within BOOKING_TRANSITION_HORIZON; later ones are picked up by the sweep as
+    they come into range. Each transition time is enqueued once, so an edit
+    that moves it enqueues a fresh task and the old one is ignored when it
+    runs. Returns the number of tasks enqueued.
+    """
+    from court_management.tasks import transition_booking_status
+
+    now = timezone.now()
+    horizon_end = now + timezone.timedelta(seconds=settings.BOOKING_TRANSITION_HORIZON)
+    scheduled = 0
+    for target, (field, sources) in TRANSITIONS.items():
+        when = getattr(booking, field)
+        if booking.status not in sources or when is None or when > horizon_end:
+            continue
+        stamp = _stamp(when)
+        if not cache.add(f'booking-transition:{booking.pk}:{target}:{stamp}', 1,
+                         timeout=settings.BOOKING_TRANSITION_HORIZON * 2):
+            continue
+        transition_booking_status.apply_async((booking.pk, target, stamp), eta=max(when, now))
+        scheduled += 1
+    return scheduled
+
+
+def apply_booking_transition(booking_id, target, stamp=None):
+    """
+    Move a booking to target once its time has come, if it is still in a
+    status it can move from. A stamp that no longer matches the booking's
+    time means it was rescheduled, and nothing is done.
+    Saved through the model so the signals keep the caches and rollup current.
+    Returns whether the booking moved.
+    """
+    field, sources = TRANSITIONS[target]
+    now = timezone.now()
+    with transaction.atomic():
+        booking = Booking.objects.select_for_update().filter(pk=booking_id, status__in=sources).first()
+        if booking is None:
+            return False
+        when = getattr(booking, field)
+        if stamp is not None and _stamp(when) != stamp:
+            return False
+        # Tasks can run before their ETA: eagerly in tests, or when redelivered
+        if when > now:
+            return False
+        if target == 'in_progress' and booking.end_time <= now:
+            # The slot passed before the booking started
+            return False
+        booking.status = target
+        booking.save(update_fields=['status', 'updated_at'])
+    logger.info(f"Booking {booking_id} moved to {target}")
+    return True
+
+
+def sweep_booking_transitions(window):
+    """
+    Safety net for transition tasks that were lost or never enqueued: apply
+    those that fell due within the last window seconds (0 looks back without
+    limit) and schedule those coming into the horizon. Returns how many
+    bookings moved.
+    """
+    now = timezone.now()
+    horizon_end = now + timezone.timedelta(seconds=settings.BOOKING_TRANSITION_HORIZON)
+
+    overdue = Booking.objects.filter(
+        Q(status='confirmed', start_time__lte=now, end_time__gt=now)
+        | Q(status='in_progress', end_time__lte=now)
+    )
+    if window:
+        overdue = overdue.filter(end_time__gt=now - timezone.timedelta(seconds=window))
+    moved = 0
+    for booking_id, status in overdue.values_list('id', 'status'):
+        if apply_booking_transition(booking_id, 'in_progress' if status == 'confirmed' else 'completed'):
+            moved += 1
+
+    upcoming = Booking.objects.filter(
+        Q(status='confirmed', start_time__gt=now, start_time__lte=horizon_end)
+        | Q(status='in_progress', end_time__gt=now, end_time__lte=horizon_end)
+    ).only('id', 'status', 'start_time', 'end_time')
+    scheduled = sum(schedule_booking_transitions(booking) for booking in upcoming)
+
+    logger.info(f"Booking transition sweep: {moved} moved, {scheduled} scheduled")
+    return moved
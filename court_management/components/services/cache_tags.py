@@ -0,0 +1,73 @@
+# court_management/components/services/cache_tags.py
+"""
+Tag-based cache invalidation.
+
+A tagged key embeds the current version of each of its tags, so invalidating
+a tag moves every key carrying it to a new name at once without listing them;
+the old entries are never read again and expire on their own.
+"""
+
+import time
+
+from django.core.cache import cache
+
+# Kept out of the per-process front tier (see SHARED_KEY_PREFIXES) so an
+# invalidation is seen by every process immediately
+TAG_VERSION_PREFIX = 'tag-version:'
+
+
+def model_tag(model):
+    """The tag every cache entry derived from a model's rows carries, e.g. 'court_management.booking'"""
+    return model._meta.label_lower
+
+
+def _initial_version():
+    # Milliseconds since the epoch, so a tag whose version was evicted never
+    # restarts at a number older entries were stored under
+    return time.time_ns() // 1_000_000
+
+
+def tag_versions(tags):
+    """Current version of each tag, fetched with one lookup"""
+    keys = {tag: TAG_VERSION_PREFIX + tag for tag in tags}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for tag, key in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[tag] = found[key]
+    return versions
+
+
+def versioned_key(key, tags, versions):
+    """
+    Name of key under the tag versions returned by tag_versions(). A value
+    computed after reading the versions and stored under this name is never
+    served once one of the tags is invalidated in the meantime.
+    """
+    return f"{key}@{'.'.join(str(versions[tag]) for tag in tags)}"
+
+
+def tagged_keys(keys, tags):
+    """Map each cache key to its name under the current versions of tags, with one lookup"""
+    versions = tag_versions(tags)
+    return {key: versioned_key(key, tags, versions) for key in keys}
+
+
+def tagged_key(key, tags):
+    """Cache key that changes whenever one of the tags is invalidated"""
+    return tagged_keys([key], tags)[key]
+
+
+def invalidate_tags(*tags):
+    """Drop every cache entry carrying any of the tags"""
+    for tag in tags:
+        key = TAG_VERSION_PREFIX + tag
+        if cache.add(key, _initial_version(), timeout=None):
+            continue
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, _initial_version(), timeout=None)
@@ -0,0 +1,159 @@
+# court_management/components/services/charts.py
+
+import hashlib
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CHART_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def chart_spec(kind, labels, values, title, x_label=None, y_label=None):
+    """Everything needed to draw a chart, as JSON-serializable data"""
+    return {
+        'kind': kind,
+        'labels': [str(label) for label in labels],
+        'values': [float(value) for value in values],
+        'title': title,
+        'x_label': x_label,
+        'y_label': y_label,
+    }
+
+
+def chart_key(report, start_date, end_date, spec):
+    """Content address of a chart: a hash of the report, date range and plotted data"""
+    payload = json.dumps(
+        [report, str(start_date), str(end_date), spec],
+        sort_keys=True, separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _spec_cache_key(key):
+    return f'chart-spec:{key}'
+
+
+def _image_cache_key(key, fmt):
+    return f'chart:{key}:{fmt}'
+
+
+def register_charts(report, start_date, end_date, specs):
+    """
+    Record a report's charts for rendering and return their content addresses.
+
+    Takes and returns a dict keyed by chart name; charts with nothing to plot
+    map to None. Charts not rendered yet are handed to one render_charts task
+    so they are drawn together; the image view renders on demand if a browser
+    asks before the worker gets to them. If the task cannot be queued, those
+    charts map to None and the report shows its no-chart placeholder.
+    """
+    keys = {}
+    pending = []
+    for name, spec in specs.items():
+        if not spec['values']:
+            keys[name] = None
+            continue
+        key = chart_key(report, start_date, end_date, spec)
+        keys[name] = key
+        if not cache.has_key(_image_cache_key(key, 'png')):
+            cache.set(_spec_cache_key(key), spec, timeout=settings.CHART_CACHE_TTL)
+            pending.append(key)
+
+    if pending:
+        from court_management.tasks import render_charts
+        try:
+            render_charts.delay(pending)
+        except Exception as e:
+            logger.error(f"Could not queue {len(pending)} {report} chart(s) for rendering: {str(e)}")
+            keys = {name: None if key in pending else key for name, key in keys.items()}
+    return keys
+
+
+def get_chart_image(key, fmt='png'):
+    """The rendered chart bytes for a content address, or None if unknown"""
+    image = cache.get(_image_cache_key(key, fmt))
+    if image is None:
+        spec = cache.get(_spec_cache_key(key))
+        if spec is None:
+            return None
+        image = render_chart(spec, fmt)
+        cache.set(_image_cache_key(key, fmt), image, timeout=settings.CHART_CACHE_TTL)
+    return image
+
+
+def render_registered_charts(keys, fmt='png'):
+    """Render and cache every registered chart that is not cached yet, concurrently"""
+    specs = {}
+    for key in keys:
+        if cache.has_key(_image_cache_key(key, fmt)):
+            continue
+        spec = cache.get(_spec_cache_key(key))
+        if spec is not None:
+            specs[key] = spec
+    if not specs:
+        return 0
+
+    # Each chart draws on its own Figure, so they can share a thread pool
+    workers = min(len(specs), settings.CHART_RENDER_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        images = executor.map(lambda spec: render_chart(spec, fmt), specs.values())
+        for key, image in zip(specs, images):
+            cache.set(_image_cache_key(key, fmt), image, timeout=settings.CHART_CACHE_TTL)
+    return len(specs)
+
+
+# Figure templates: a figure size plus a function drawing a spec onto the axes
+
+def _draw_series(axes, spec):
+    if spec['kind'] == 'line':
+        axes.plot(spec['labels'], spec['values'], marker='o')
+    else:
+        axes.bar(spec['labels'], spec['values'])
+    axes.set_title(spec['title'])
+    axes.set_xlabel(spec['x_label'])
+    axes.set_ylabel(spec['y_label'])
+    axes.tick_params(axis='x', labelrotation=45)
+
+
+def _draw_pie(axes, spec):
+    axes.pie(spec['values'], labels=spec['labels'], autopct='%1.1f%%')
+    axes.set_title(spec['title'])
+
+
+FIGURE_TEMPLATES = {
+    'line': ((10, 6), _draw_series, True),
+    'bar': ((10, 6), _draw_series, True),
+    'pie': ((8, 8), _draw_pie, False),
+}
+
+
+def render_chart(spec, fmt='png'):
+    """
+    Draw a chart spec and return the image bytes.
+
+    Uses a standalone Figure with the Agg canvas rather than pyplot, which
+    keeps global state and is not safe to call from several threads.
+    """
+    # Imported here so only the processes that draw charts load matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figsize, draw, tight = FIGURE_TEMPLATES[spec['kind']]
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    draw(figure.add_subplot(), spec)
+    if tight:
+        figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=fmt)
+    return buffer.getvalue()
@@ -0,0 +1,45 @@
+# court_management/components/services/dashboard.py
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models import Booking, Court, Customer, Employee
+from .cache_tags import model_tag, tagged_key, invalidate_tags
+
+DASHBOARD_CACHE_KEY = 'dashboard:stats'
+# Dropped whenever one of the models counted changes, or on demand via 'dashboard'
+DASHBOARD_TAGS = ('dashboard',) + tuple(model_tag(model) for model in (Booking, Court, Customer, Employee))
+
+
+def get_dashboard_stats():
+    """
+    Site-wide dashboard figures: active court, customer and employee counts
+    and the five most recent bookings as display-ready activity entries.
+    
+    Cached for DASHBOARD_CACHE_TTL seconds under the tags of the models
+    involved, which their write signals invalidate, so the counts only run
+    after something changed.
+    """
+    key = tagged_key(DASHBOARD_CACHE_KEY, DASHBOARD_TAGS)
+    stats = cache.get(key)
+    if stats is None:
+        recent_bookings = Booking.objects.select_related('customer', 'court').order_by('-created_at')[:5]
+        stats = {
+            'active_courts': Court.objects.filter(active=True).count(),
+            'total_customers': Customer.objects.filter(active=True).count(),
+            'active_employees': Employee.objects.filter(active=True).count(),
+            'recent_activities': [
+                {
+                    'title': f"New booking by {booking.customer.name}",
+                    'description': f"Court {booking.court.name} at {booking.start_time.strftime('%Y-%m-%d %H:%M')}",
+                    'timestamp': booking.created_at,
+                }
+                for booking in recent_bookings
+            ],
+        }
+        cache.set(key, stats, timeout=settings.DASHBOARD_CACHE_TTL)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    invalidate_tags('dashboard')
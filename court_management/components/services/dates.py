@@ -0,0 +1,48 @@
+# court_management/components/services/dates.py
+"""
+Calendar dates and months as half-open [start, end) datetime ranges in the
+current time zone.
+
+Filtering on `start_time__gte`/`__lt` with these bounds keeps the column bare,
+so the database can answer with an index range scan; `__date`, `__year` and
+`__month` lookups wrap the column in a cast or extract and cannot use one.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def start_of_day(day):
+    """Local midnight at the start of a calendar date, as an aware datetime"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def month_bounds(year, month):
+    """First day of the month and first day of the following month"""
+    first = date(year, month, 1)
+    following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first, following
+
+
+def day_range(day):
+    return start_of_day(day), start_of_day(day + timedelta(days=1))
+
+
+def date_range(start_date, end_date):
+    """Range covering the dates from start_date to end_date inclusive"""
+    return start_of_day(start_date), start_of_day(end_date + timedelta(days=1))
+
+
+def month_range(year, month):
+    first, following = month_bounds(year, month)
+    return start_of_day(first), start_of_day(following)
+
+
+def range_lookup(field, bounds):
+    """
+    Filter keyword arguments selecting bounds on a field, e.g.
+    Booking.objects.filter(**range_lookup('start_time', day_range(today)))
+    """
+    start, end = bounds
+    return {f'{field}__gte': start, f'{field}__lt': end}
@@ -0,0 +1,169 @@
+# court_management/components/services/outbox.py
+
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _default_key(subject, body, to):
+    # Scoped to the current dedupe window, so a retried request is absorbed
+    # but the same email sent again later (e.g. a repeated reminder) is not
+    window = int(timezone.now().timestamp()) // settings.OUTBOX_DEDUPE_WINDOW
+    payload = '\0'.join([subject, body, *to])
+    return f'content:{window}:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue_email(subject, body, to, from_email=None, html_body='', headers=None, idempotency_key=None):
+    """
+    Store an email in the outbox and schedule its delivery once the current
+    transaction commits. Enqueueing the same idempotency key again (by
+    default a hash of the content and recipients, within the current
+    OUTBOX_DEDUPE_WINDOW) is a no-op.
+    Returns the OutboundEmail and whether it was newly created.
+    """
+    to = list(to)
+    email, created = OutboundEmail.objects.get_or_create(
+        idempotency_key=idempotency_key or _default_key(subject, body, to),
+        defaults={
+            'subject': subject,
+            'body': body,
+            'html_body': html_body,
+            'from_email': from_email or '',
+            'to': to,
+            'headers': headers or {},
+        },
+    )
+    if created:
+        transaction.on_commit(_queue_delivery)
+    return email, created
+
+
+def _queue_delivery():
+    from court_management.tasks import deliver_outbound_emails
+    try:
+        deliver_outbound_emails.delay()
+    except Exception as e:
+        # The email is stored; the periodic drain delivers it once the broker is back
+        logger.warning(f"Could not queue outbox delivery, leaving it to the periodic drain: {str(e)}")
+
+
+def enqueue_message(message, idempotency_key=None):
+    """Enqueue a rendered EmailMessage, e.g. one built by the allauth adapter"""
+    html_body = ''
+    for content, mimetype in getattr(message, 'alternatives', []):
+        if mimetype == 'text/html':
+            html_body = content
+    if message.content_subtype == 'html':
+        html_body, body = message.body, ''
+    else:
+        body = message.body
+    return enqueue_email(
+        message.subject, body, message.to,
+        from_email=message.from_email, html_body=html_body,
+        headers=message.extra_headers, idempotency_key=idempotency_key,
+    )
+
+
+class OutboxEmailMessage(EmailMultiAlternatives):
+    """An email message whose send() queues it in the outbox"""
+    idempotency_key = None
+
+    def send(self, fail_silently=False):
+        enqueue_message(self, idempotency_key=self.idempotency_key)
+        return 1
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email, email.to,
+        headers=email.headers, connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(
+        settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.OUTBOX_RETRY_BACKOFF_MAX,
+    ))
+
+
+def _claim_batch(batch_size, now):
+    """
+    Lease up to batch_size due emails to this worker by moving their next
+    attempt past OUTBOX_CLAIM_TIMEOUT. The rows are locked only while being
+    claimed; a worker that dies mid-batch leaves them to be claimed again
+    once the lease runs out.
+    """
+    with transaction.atomic():
+        batch = list(OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+            status='pending',
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at', 'id')[:batch_size])
+        lease_until = now + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = lease_until
+        OutboundEmail.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def deliver_pending_emails(batch_size):
+    """
+    Send one batch of due outbox emails over a single SMTP connection.
+    The batch is claimed and committed before sending, and each result is
+    recorded as soon as it is known, so no lock is held across SMTP and a
+    failure part way through does not send the delivered emails again.
+    Failures are rescheduled with exponential backoff until
+    OUTBOX_MAX_ATTEMPTS is reached. Returns how many emails were claimed.
+    """
+    now = timezone.now()
+    batch = _claim_batch(batch_size, now)
+    if not batch:
+        return 0
+
+    try:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+    except Exception as e:
+        logger.error(f"Error opening mail connection for the outbox: {str(e)}")
+        connection = None
+
+    sent = 0
+    try:
+        for email in batch:
+            try:
+                if connection is None:
+                    raise ConnectionError("No mail connection")
+                connection.send_messages([_build_message(email, connection)])
+            except Exception as e:
+                if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    OutboundEmail.objects.filter(pk=email.pk).update(status='failed', last_error=str(e))
+                    logger.error(f"Giving up on outbound email {email.id}: {str(e)}")
+                else:
+                    OutboundEmail.objects.filter(pk=email.pk).update(
+                        next_attempt_at=timezone.now() + _retry_delay(email.attempts), last_error=str(e),
+                    )
+                    logger.warning(f"Outbound email {email.id} failed, retrying later: {str(e)}")
+            else:
+                OutboundEmail.objects.filter(pk=email.pk).update(
+                    status='sent', sent_at=timezone.now(), last_error='',
+                )
+                sent += 1
+    finally:
+        if connection is not None:
+            connection.close()
+
+    logger.info(f"Outbox delivered {sent} of {len(batch)} emails")
+    return len(batch)
@@ -0,0 +1,173 @@
+# court_management/components/services/revenue.py
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from ..models import Booking, DailyRevenueRollup, Payment
+from .dates import day_range, range_lookup, start_of_day
+
+logger = logging.getLogger(__name__)
+
+# Figures an upsert overwrites on an existing (date, court, payment_method) row
+_ROLLUP_FIELDS = [
+    'bookings_count', 'completed_count', 'booking_revenue',
+    'payments_count', 'payment_revenue', 'updated_at',
+]
+
+
+def _rollup_rows(bookings, payments):
+    """DailyRevenueRollup rows from grouped booking and payment aggregates"""
+    rows = [
+        DailyRevenueRollup(
+            date=item['date'],
+            court_id=item['court_id'],
+            payment_method=DailyRevenueRollup.BOOKING_TOTALS,
+            bookings_count=item['bookings_count'],
+            completed_count=item['completed_count'],
+            booking_revenue=item['revenue'] or Decimal('0.00'),
+        )
+        for item in bookings.annotate(date=TruncDate('start_time')).values('date', 'court_id').annotate(
+            bookings_count=Count('id'),
+            completed_count=Count('id', filter=Q(status='completed')),
+            revenue=Sum('fee'),
+        ).order_by()
+    ]
+    rows += [
+        DailyRevenueRollup(
+            date=item['date'],
+            court_id=item['booking__court_id'],
+            payment_method=item['payment_method'],
+            payments_count=item['payments_count'],
+            payment_revenue=item['revenue'] or Decimal('0.00'),
+        )
+        for item in payments.annotate(date=TruncDate('booking__start_time')).values(
+            'date', 'booking__court_id', 'payment_method'
+        ).annotate(
+            payments_count=Count('id'),
+            revenue=Sum('amount'),
+        ).order_by()
+    ]
+    return rows
+
+
+def refresh_revenue_rollup(court_id, day):
+    """
+    Recompute the rollup rows of one court and local day. Rows are upserted
+    rather than deleted and recreated, so refreshes of the same day running
+    at once cannot collide on the unique constraint. Returns the row count.
+    """
+    bounds = day_range(day)
+    bookings = Booking.objects.filter(court_id=court_id, **range_lookup('start_time', bounds))
+    payments = Payment.objects.filter(booking__court_id=court_id, **range_lookup('booking__start_time', bounds))
+    rows = _rollup_rows(bookings, payments)
+    with transaction.atomic():
+        DailyRevenueRollup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            # MySQL and MariaDB infer the conflicting constraint themselves
+            unique_fields=(
+                ['date', 'court', 'payment_method']
+                if connection.features.supports_update_conflicts_with_target else None
+            ),
+            update_fields=_ROLLUP_FIELDS,
+        )
+        DailyRevenueRollup.objects.filter(date=day, court_id=court_id).exclude(
+            payment_method__in=[row.payment_method for row in rows]
+        ).delete()
+    return len(rows)
+
+
+def schedule_revenue_rollup_refresh(court_id, start_time):
+    """
+    Refresh the rollup of the court and local day a booking starting at
+    start_time falls in, from a task queued once the current transaction
+    commits so the write it follows is visible and not held up.
+    """
+    day = timezone.localdate(start_time)
+    transaction.on_commit(lambda: _queue_rollup_refresh(court_id, day))
+
+
+def _queue_rollup_refresh(court_id, day):
+    from court_management.tasks import refresh_revenue_rollup_day
+    try:
+        refresh_revenue_rollup_day.delay(court_id, day.isoformat())
+    except Exception as e:
+        # reconcile_revenue_rollup would catch it overnight, but the report should not lag until then
+        logger.warning(f"Could not queue the revenue rollup refresh for court {court_id} on {day}, refreshing inline: {str(e)}")
+        refresh_revenue_rollup(court_id, day)
+
+
+def rebuild_revenue_rollup(start_date=None, end_date=None):
+    """
+    Recompute the rollup from the raw bookings and payments, optionally only
+    for the days from start_date to end_date inclusive. Returns the row count.
+    """
+    bookings = Booking.objects.all()
+    payments = Payment.objects.all()
+    rollups = DailyRevenueRollup.objects.all()
+    if start_date is not None:
+        start = start_of_day(start_date)
+        bookings = bookings.filter(start_time__gte=start)
+        payments = payments.filter(booking__start_time__gte=start)
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date is not None:
+        end = start_of_day(end_date + timedelta(days=1))
+        bookings = bookings.filter(start_time__lt=end)
+        payments = payments.filter(booking__start_time__lt=end)
+        rollups = rollups.filter(date__lte=end_date)
+
+    rows = _rollup_rows(bookings, payments)
+    with transaction.atomic():
+        rollups.delete()
+        DailyRevenueRollup.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def revenue_summary(start_date, end_date):
+    """Sales report figures for the days from start_date to end_date inclusive, read from the rollup"""
+    rollups = DailyRevenueRollup.objects.filter(date__gte=start_date, date__lte=end_date)
+    booking_totals = rollups.filter(payment_method=DailyRevenueRollup.BOOKING_TOTALS)
+    payment_labels = dict(Payment.PAYMENT_METHOD_CHOICES)
+
+    totals = booking_totals.aggregate(
+        revenue=Sum('booking_revenue'),
+        bookings_count=Sum('bookings_count'),
+        completed_count=Sum('completed_count'),
+    )
+    daily_revenue = booking_totals.values('date').annotate(
+        revenue=Sum('booking_revenue'),
+        bookings_count=Sum('bookings_count'),
+    ).order_by('date')
+    monthly_revenue = booking_totals.annotate(month=TruncMonth('date')).values('month').annotate(
+        revenue=Sum('booking_revenue'),
+        bookings_count=Sum('bookings_count'),
+    ).order_by('month')
+    court_revenue = booking_totals.values('court__name').annotate(
+        revenue=Sum('booking_revenue'),
+        bookings_count=Sum('bookings_count'),
+    ).order_by('-revenue')
+    payment_method_revenue = [
+        dict(item, payment_method_display=payment_labels.get(item['payment_method'], item['payment_method']))
+        for item in rollups.exclude(payment_method=DailyRevenueRollup.BOOKING_TOTALS).values(
+            'payment_method'
+        ).annotate(
+            revenue=Sum('payment_revenue'),
+            payments_count=Sum('payments_count'),
+        ).order_by('-revenue')
+    ]
+
+    return {
+        'total_revenue': totals['revenue'] or Decimal('0.00'),
+        'total_bookings_count': totals['bookings_count'] or 0,
+        'completed_bookings_count': totals['completed_count'] or 0,
+        'daily_revenue': daily_revenue,
+        'monthly_revenue': monthly_revenue,
+        'court_revenue': court_revenue,
+        'payment_method_revenue': payment_method_revenue,
+    }
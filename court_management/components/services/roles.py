@@ -0,0 +1,57 @@
+# court_management/components/services/roles.py
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models import Customer
+from .cache_tags import invalidate_tags, tagged_key, tagged_keys
+
+CUSTOMERS_GROUP = 'Customers'
+
+UserRole = namedtuple('UserRole', ['is_customer', 'customer'])
+
+ANONYMOUS_ROLE = UserRole(is_customer=False, customer=None)
+
+# Invalidated when groups themselves change, dropping every cached role at once
+ROLE_TAGS = ('user-roles',)
+
+
+def _cache_key(user_id):
+    return f'user-role:{user_id}'
+
+
+def get_user_role(user):
+    """
+    Whether the user belongs to the Customers group, and their Customer
+    profile (None when they have none).
+    
+    Resolved at most once per user object and otherwise served from a per-user
+    cache entry that the group membership and Customer signals invalidate.
+    """
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS_ROLE
+    
+    role = getattr(user, '_court_role', None)
+    if role is None:
+        key = tagged_key(_cache_key(user.pk), ROLE_TAGS)
+        role = cache.get(key)
+        if role is None:
+            role = UserRole(
+                is_customer=user.groups.filter(name=CUSTOMERS_GROUP).exists(),
+                customer=Customer.objects.filter(user=user).first(),
+            )
+            cache.set(key, role, timeout=settings.USER_ROLE_CACHE_TTL)
+        user._court_role = role
+    return role
+
+
+def invalidate_user_role(*user_ids):
+    keys = [_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(tagged_keys(keys, ROLE_TAGS).values())
+
+
+def invalidate_all_user_roles():
+    invalidate_tags(*ROLE_TAGS)
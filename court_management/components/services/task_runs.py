@@ -0,0 +1,83 @@
+# court_management/components/services/task_runs.py
+
+import functools
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.utils import timezone
+
+from ..models import TaskRun
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def task_lock(name, timeout):
+    """
+    Non-blocking distributed lock; yields whether it was acquired.
+
+    Held in the shared cache tier so every worker and beat process sees the
+    same lock; like the rest of the cache settings, that tier is Redis only
+    when Redis is configured and tests are not running. The lock expires
+    after timeout seconds in case its holder dies mid-run.
+    """
+    shared = caches['shared']
+    key = f'task-lock:{name}'
+    token = uuid.uuid4().hex
+    acquired = shared.add(key, token, timeout=timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                # Expired and possibly taken over by another run otherwise
+                if shared.get(key) == token:
+                    shared.delete(key)
+            except Exception as e:
+                logger.warning(f"Could not release task lock {name}: {str(e)}")
+
+
+def tracked_task_run(lock_timeout):
+    """
+    Decorate a task body so runs never overlap and each one is recorded.
+
+    The wrapped function returns the number of rows it touched. An invocation
+    that finds the previous run still holding the lock is skipped. Every
+    invocation, skipped or not, is stored as a TaskRun with its duration.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started_at = timezone.now()
+            started = time.monotonic()
+            run = TaskRun(task_name=name, started_at=started_at)
+            with task_lock(name, lock_timeout) as acquired:
+                if not acquired:
+                    logger.info(f"Skipping {name}: previous run still in progress")
+                    run.status = 'skipped'
+                    run.save()
+                    return 0
+                try:
+                    run.rows_touched = func(*args, **kwargs) or 0
+                    run.status = 'succeeded'
+                except Exception as e:
+                    run.status = 'failed'
+                    run.error = str(e)
+                    raise
+                finally:
+                    run.duration = time.monotonic() - started
+                    run.save()
+            return run.rows_touched
+        return wrapper
+    return decorator
+
+
+def prune_task_runs(days):
+    """Delete TaskRun records older than the given number of days"""
+    deleted, _ = TaskRun.objects.filter(started_at__lt=timezone.now() - timezone.timedelta(days=days)).delete()
+    return deleted
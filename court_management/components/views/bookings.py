@@ -5,14 +5,15 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.utils import timezone
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
+from django.db.models import Q
+from datetime import datetime, timedelta
 
 from ..models import (
-    Customer, Booking 
+    Customer, Booking, BookingConflictError
 )
+from ..services import start_of_day
 from ..forms import (
-    BookingForm, PaymentForm
+    BookingForm, BookingFilterForm, PaymentForm
 )
 
 from django.contrib.auth.decorators import login_required, permission_required
@@ -27,28 +28,94 @@ class BookingListView(PermissionRequiredMixin, LoginRequiredMixin, ListView):
     template_name = 'court_management/booking_list.html'
     context_object_name = 'bookings'
     permission_required = 'court_management.view_booking'
+    page_size = 25
     
     def get_queryset(self):
         # Check if user is a customer
-        self.is_customer = self.request.user.groups.filter(name='Customers').exists()
+        self.is_customer = self.request.is_customer
         
         # If user is a customer, only show their bookings
         if self.is_customer:
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                return Booking.objects.filter(customer=customer).order_by('start_time')
-            except Customer.DoesNotExist:
+            if self.request.customer is None:
                 return Booking.objects.none()
-        # Staff and admin can see all bookings
-        return Booking.objects.all().order_by('start_time')
+            queryset = Booking.objects.filter(customer=self.request.customer)
+        else:
+            # Staff and admin can see all bookings
+            queryset = Booking.objects.all()
+        
+        # Load customer and court with the bookings instead of once per row
+        queryset = queryset.select_related('customer__user', 'court')
+        
+        self.filter_form = BookingFilterForm(self.request.GET or None)
+        if self.filter_form.is_valid():
+            filters = self.filter_form.cleaned_data
+            if filters['court']:
+                queryset = queryset.filter(court=filters['court'])
+            if filters['status']:
+                queryset = queryset.filter(status=filters['status'])
+            if filters['date_from']:
+                queryset = queryset.filter(start_time__gte=start_of_day(filters['date_from']))
+            if filters['date_to']:
+                queryset = queryset.filter(start_time__lt=start_of_day(filters['date_to'] + timedelta(days=1)))
+        
+        return queryset
+    
+    def paginate_keyset(self, queryset):
+        """
+        Seek pagination on (start_time, id): each page continues from the
+        cursor of the previous one instead of counting past skipped rows, so
+        every page costs the same however long the booking history gets.
+        Returns the page of bookings and the cursors of the adjacent pages.
+        """
+        after = _parse_cursor(self.request.GET.get('after'))
+        before = _parse_cursor(self.request.GET.get('before'))
+        
+        if before:
+            start_time, pk = before
+            rows = list(queryset.filter(
+                Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=pk)
+            ).order_by('-start_time', '-id')[:self.page_size + 1])
+            has_previous, has_next = len(rows) > self.page_size, True
+            rows = rows[:self.page_size][::-1]
+        else:
+            if after:
+                start_time, pk = after
+                queryset = queryset.filter(
+                    Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=pk)
+                )
+            rows = list(queryset.order_by('start_time', 'id')[:self.page_size + 1])
+            has_previous, has_next = after is not None, len(rows) > self.page_size
+            rows = rows[:self.page_size]
+        
+        previous_cursor = _make_cursor(rows[0]) if rows and has_previous else None
+        next_cursor = _make_cursor(rows[-1]) if rows and has_next else None
+        return rows, previous_cursor, next_cursor
     
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        bookings, previous_cursor, next_cursor = self.paginate_keyset(self.object_list)
+        context = super().get_context_data(object_list=bookings, **kwargs)
         # Add context to indicate if user can add bookings
         context['can_add_booking'] = self.request.user.has_perm('court_management.add_booking')
         context['is_customer'] = self.is_customer
+        context['filter_form'] = getattr(self, 'filter_form', BookingFilterForm())
+        context['previous_cursor'] = previous_cursor
+        context['next_cursor'] = next_cursor
         return context
 
+
+def _make_cursor(booking):
+    return f"{booking.start_time.isoformat()}_{booking.pk}"
+
+def _parse_cursor(value):
+    """Decode a '<start_time>_<id>' cursor, ignoring malformed values"""
+    if not value:
+        return None
+    try:
+        start_time, pk = value.rsplit('_', 1)
+        return datetime.fromisoformat(start_time), int(pk)
+    except ValueError:
+        return None
+
 class BookingDetailView(PermissionRequiredMixin, LoginRequiredMixin, DetailView):
     model = Booking
     template_name = 'court_management/booking_detail.html'
@@ -58,13 +125,8 @@ class BookingDetailView(PermissionRequiredMixin, LoginRequiredMixin, DetailView)
     def get_object(self):
         obj = super().get_object()
         # If user is a customer, check if this is their booking
-        if self.request.user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                if obj.customer != customer:
-                    from django.core.exceptions import PermissionDenied
-                    raise PermissionDenied
-            except Customer.DoesNotExist:
+        if self.request.is_customer:
+            if self.request.customer is None or obj.customer_id != self.request.customer.pk:
                 from django.core.exceptions import PermissionDenied
                 raise PermissionDenied
         return obj
@@ -83,23 +145,34 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
     
     def get_success_url(self):
         # If user is a customer, redirect to their bookings
-        if self.request.user.groups.filter(name='Customers').exists():
+        if self.request.is_customer:
             return reverse_lazy('booking-list')
         return reverse_lazy('booking-list')
     
     def form_valid(self, form):
         # If user is a customer, set the customer to their profile
-        if self.request.user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                form.instance.customer = customer
-            except Customer.DoesNotExist:
+        if self.request.is_customer:
+            if self.request.customer is None:
                 form.add_error(None, "You don't have a customer profile.")
                 return self.form_invalid(form)
+            form.instance.customer = self.request.customer
+        
+        # Reserve the slot atomically so concurrent submissions cannot double-book
+        booking = form.instance
+        try:
+            self.object = Booking.objects.reserve(
+                booking.court, booking.start_time, booking.end_time, booking.customer,
+                fee=booking.fee,
+                status=booking.status,
+                payment_status=booking.payment_status,
+                notes=booking.notes,
+            )
+        except BookingConflictError as e:
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
         
-        response = super().form_valid(form)
         messages.success(self.request, 'Booking created successfully!')
-        return response
+        return redirect(self.get_success_url())
     
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -110,15 +183,10 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Add customer info to context
-        is_customer = self.request.user.groups.filter(name='Customers').exists()
-        context['is_customer'] = is_customer
+        context['is_customer'] = self.request.is_customer
         
-        if is_customer:
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                context['customer'] = customer
-            except Customer.DoesNotExist:
-                pass
+        if self.request.is_customer and self.request.customer is not None:
+            context['customer'] = self.request.customer
         return context
 
 class BookingUpdateView(PermissionRequiredMixin, LoginRequiredMixin, UpdateView):
@@ -131,19 +199,18 @@ class BookingUpdateView(PermissionRequiredMixin, LoginRequiredMixin, UpdateView)
     def get_object(self):
         obj = super().get_object()
         # If user is a customer, check if this is their booking
-        if self.request.user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                if obj.customer != customer:
-                    from django.core.exceptions import PermissionDenied
-                    raise PermissionDenied
-            except Customer.DoesNotExist:
+        if self.request.is_customer:
+            if self.request.customer is None or obj.customer_id != self.request.customer.pk:
                 from django.core.exceptions import PermissionDenied
                 raise PermissionDenied
         return obj
     
     def form_valid(self, form):
-        response = super().form_valid(form)
+        try:
+            response = super().form_valid(form)
+        except BookingConflictError as e:
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
         messages.success(self.request, 'Booking updated successfully!')
         return response
     
@@ -156,15 +223,10 @@ class BookingUpdateView(PermissionRequiredMixin, LoginRequiredMixin, UpdateView)
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Add customer info to context
-        is_customer = self.request.user.groups.filter(name='Customers').exists()
-        context['is_customer'] = is_customer
+        context['is_customer'] = self.request.is_customer
         
-        if is_customer:
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                context['customer'] = customer
-            except Customer.DoesNotExist:
-                pass
+        if self.request.is_customer and self.request.customer is not None:
+            context['customer'] = self.request.customer
         return context
 
 class BookingDeleteView(PermissionRequiredMixin, LoginRequiredMixin, DeleteView):
@@ -176,13 +238,8 @@ class BookingDeleteView(PermissionRequiredMixin, LoginRequiredMixin, DeleteView)
     def get_object(self):
         obj = super().get_object()
         # If user is a customer, check if this is their booking
-        if self.request.user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                if obj.customer != customer:
-                    from django.core.exceptions import PermissionDenied
-                    raise PermissionDenied
-            except Customer.DoesNotExist:
+        if self.request.is_customer:
+            if self.request.customer is None or obj.customer_id != self.request.customer.pk:
                 from django.core.exceptions import PermissionDenied
                 raise PermissionDenied
         return obj
@@ -231,13 +288,8 @@ def customer_booking_history(request, customer_id):
     customer = get_object_or_404(Customer, pk=customer_id)
     
     # Check permissions
-    if request.user.groups.filter(name='Customers').exists():
-        try:
-            user_customer = Customer.objects.get(user=request.user)
-            if customer != user_customer:
-                from django.core.exceptions import PermissionDenied
-                raise PermissionDenied
-        except Customer.DoesNotExist:
+    if request.is_customer:
+        if request.customer is None or customer.pk != request.customer.pk:
             from django.core.exceptions import PermissionDenied
             raise PermissionDenied
     
@@ -1,15 +1,19 @@
 # court_management/component/views/courts.py
 
-from django.shortcuts import redirect
+from datetime import datetime
+
+from django.shortcuts import render, redirect
+from django.http import JsonResponse
+from django.utils import timezone
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib import messages
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
 
 from ..models import ( Court, Booking )
 from ..forms import ( CourtForm )
+from ..services import court_availability as get_court_availability
 
+from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
@@ -75,3 +79,66 @@ class CourtDeleteView(PermissionRequiredMixin, LoginRequiredMixin, DeleteView):
         messages.success(request, 'Court deactivated successfully!')
         return redirect('court-list')
 
+# Court Availability Views
+MAX_AVAILABILITY_DAYS = 14
+
+def _parse_availability_params(request):
+    """Read ?date=YYYY-MM-DD&days=N, raising ValueError on bad input"""
+    date_param = request.GET.get('date')
+    if date_param:
+        start_date = datetime.strptime(date_param, '%Y-%m-%d').date()
+    else:
+        start_date = timezone.localdate()
+    
+    days = int(request.GET.get('days', 1))
+    if not 1 <= days <= MAX_AVAILABILITY_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_AVAILABILITY_DAYS}")
+    
+    return start_date, days
+
+@login_required
+@permission_required('court_management.view_court', raise_exception=True)
+def court_availability(request):
+    try:
+        start_date, days = _parse_availability_params(request)
+    except ValueError as e:
+        messages.error(request, str(e))
+        start_date, days = timezone.localdate(), 1
+    
+    context = {
+        'start_date': start_date,
+        'days': days,
+        'availability': get_court_availability(start_date, days),
+    }
+    return render(request, 'court_management/court_availability.html', context)
+
+@login_required
+@permission_required('court_management.view_court', raise_exception=True)
+def court_availability_api(request):
+    try:
+        start_date, days = _parse_availability_params(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    def slots(blocks):
+        return [
+            {'start': timezone.localtime(start).isoformat(), 'end': timezone.localtime(end).isoformat()}
+            for start, end in blocks
+        ]
+    
+    courts = []
+    for entry in get_court_availability(start_date, days):
+        courts.append({
+            'id': entry['court'].pk,
+            'name': entry['court'].name,
+            'days': [
+                {'date': day['date'].isoformat(), 'busy': slots(day['busy']), 'free': slots(day['free'])}
+                for day in entry['days']
+            ],
+        })
+    
+    return JsonResponse({
+        'start_date': start_date.isoformat(),
+        'days': days,
+        'courts': courts,
+    })
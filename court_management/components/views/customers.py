@@ -4,8 +4,6 @@ from django.shortcuts import redirect
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib import messages
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
 
 from ..models import ( Customer, Booking )
 from ..forms import ( CustomerForm )
@@ -26,11 +24,9 @@ class CustomerListView(PermissionRequiredMixin, LoginRequiredMixin, ListView):
         if self.request.user.is_staff or self.request.user.is_superuser:
             return Customer.objects.filter(active=True)
         # Customers can only see themselves
-        try:
-            customer = Customer.objects.get(user=self.request.user)
-            return Customer.objects.filter(id=customer.id)
-        except Customer.DoesNotExist:
+        if self.request.customer is None:
             return Customer.objects.none()
+        return Customer.objects.filter(id=self.request.customer.pk)
 
 class CustomerDetailView(PermissionRequiredMixin, LoginRequiredMixin, DetailView):
     model = Customer
@@ -41,13 +37,8 @@ class CustomerDetailView(PermissionRequiredMixin, LoginRequiredMixin, DetailView
     def get_object(self):
         obj = super().get_object()
         # If user is a customer, check if this is their profile
-        if self.request.user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                if obj.id != customer.id:
-                    from django.core.exceptions import PermissionDenied
-                    raise PermissionDenied
-            except Customer.DoesNotExist:
+        if self.request.is_customer:
+            if self.request.customer is None or obj.id != self.request.customer.pk:
                 from django.core.exceptions import PermissionDenied
                 raise PermissionDenied
         return obj
@@ -82,13 +73,8 @@ class CustomerUpdateView(PermissionRequiredMixin, LoginRequiredMixin, UpdateView
     def get_object(self):
         obj = super().get_object()
         # If user is a customer, check if this is their profile
-        if self.request.user.groups.filter(name='Customers').exists():
-            try:
-                customer = Customer.objects.get(user=self.request.user)
-                if obj.id != customer.id:
-                    from django.core.exceptions import PermissionDenied
-                    raise PermissionDenied
-            except Customer.DoesNotExist:
+        if self.request.is_customer:
+            if self.request.customer is None or obj.id != self.request.customer.pk:
                 from django.core.exceptions import PermissionDenied
                 raise PermissionDenied
         return obj
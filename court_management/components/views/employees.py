@@ -5,13 +5,12 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.utils import timezone
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
 
 import calendar
 
 from ..models import ( Employee, WorkSchedule, TimeEntry )
 from ..forms import ( EmployeeForm )
+from ..services import month_bounds, month_range, range_lookup
 
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
@@ -93,15 +92,13 @@ def employee_schedule(request, employee_id, year=None, month=None):
     # Get work schedules for the month
     schedules = WorkSchedule.objects.filter(
         employee=employee,
-        date__year=year,
-        date__month=month
+        **range_lookup('date', month_bounds(year, month))
     ).order_by('date', 'start_time')
     
     # Get time entries for the month
     time_entries = TimeEntry.objects.filter(
         employee=employee,
-        clock_in__year=year,
-        clock_in__month=month
+        **range_lookup('clock_in', month_range(year, month))
     ).order_by('clock_in')
     
     # Calculate total hours worked
@@ -1,27 +1,38 @@
 # court_management/components/views/reports.py
 
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncDate, TruncMonth
-from django.http import HttpResponse
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-
-import matplotlib.pyplot as plt
-import io
-import base64
-import pandas as pd
+from django.db.models import Sum, Count, F, Q, DurationField, ExpressionWrapper
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.views.decorators.http import condition
 import calendar
+import csv
 from datetime import datetime, timedelta
 
-from ..models import ( Booking, Payment, Employee, TimeEntry )
+from ..models import ( Booking, Employee, TimeEntry )
+from ..services.charts import CHART_FORMATS, chart_spec, get_chart_image, register_charts
+from ..services.revenue import revenue_summary
+from ..services.dates import date_range, month_range, range_lookup
  
 from django.contrib.auth.decorators import login_required, permission_required
 
 # Import Decimal for precise calculations
 from decimal import Decimal
 
+# Rows fetched per database round trip while streaming CSV exports
+CSV_EXPORT_CHUNK_SIZE = 2000
+
+SALES_REPORT_CSV_HEADER = [
+    'Booking ID', 'Customer', 'Court', 'Start Time', 'End Time',
+    'Duration (hours)', 'Fee', 'Payment Status', 'Status',
+]
+
+
+class Echo:
+    """File-like object whose write() hands the value back, for csv.writer"""
+    def write(self, value):
+        return value
+
 # Report Views
 @login_required
 @permission_required('court_management.view_booking', raise_exception=True)
@@ -35,76 +46,47 @@ def sales_report(request):
     else:
         start_date = end_date - timedelta(days=30)
     
-    # Get bookings within date range
-    bookings = Booking.objects.filter(
-        start_time__date__gte=start_date,
-        start_time__date__lte=end_date
-    )
-    
-    # Calculate total revenue
-    total_revenue = bookings.aggregate(total=Sum('fee'))['total'] or Decimal('0.00')
-    
-    # Calculate daily revenue
-    daily_revenue = bookings.annotate(
-        date=TruncDate('start_time')
-    ).values('date').annotate(
-        revenue=Sum('fee'),
-        bookings_count=Count('id')
-    ).order_by('date')
+    # Read the pre-aggregated daily revenue rollup rather than the raw
+    # booking and payment history
+    summary = revenue_summary(start_date, end_date)
+    total_revenue = summary['total_revenue']
+    total_bookings_count = summary['total_bookings_count']
+    daily_revenue = summary['daily_revenue']
+    monthly_revenue = summary['monthly_revenue']
+    court_revenue = summary['court_revenue']
+    payment_method_revenue = summary['payment_method_revenue']
     
-    # Calculate total bookings count (sum of bookings_count from daily_revenue)
-    total_bookings_count = sum(item['bookings_count'] for item in daily_revenue)
-
     # Calculate average revenue per booking
     avg_revenue_per_booking = Decimal('0.00')
     if total_bookings_count > 0:
         avg_revenue_per_booking = total_revenue / total_bookings_count
     
-    # Calculate monthly revenue
-    monthly_revenue = bookings.annotate(
-        month=TruncMonth('start_time')
-    ).values('month').annotate(
-        revenue=Sum('fee'),
-        bookings_count=Count('id')
-    ).order_by('month')
-    
-    # Revenue by court
-    court_revenue = bookings.values('court__name').annotate(
-        revenue=Sum('fee'),
-        bookings_count=Count('id')
-    ).order_by('-revenue')
-    
-    # Revenue by payment method
-    payment_method_revenue = Payment.objects.filter(
-        booking__start_time__date__gte=start_date,
-        booking__start_time__date__lte=end_date
-    ).values('payment_method').annotate(
-        revenue=Sum('amount'),
-        payments_count=Count('id')
-    ).order_by('-revenue')
-    
-    # Generate charts
-    daily_chart = generate_line_chart(
-        [item['date'].strftime('%Y-%m-%d') for item in daily_revenue],
-        [float(item['revenue']) for item in daily_revenue],
-        'Daily Revenue',
-        'Date',
-        'Revenue ($)'
-    )
-    
-    court_chart = generate_bar_chart(
-        [item['court__name'] for item in court_revenue],
-        [float(item['revenue']) for item in court_revenue],
-        'Revenue by Court',
-        'Court',
-        'Revenue ($)'
-    )
-    
-    payment_chart = generate_pie_chart(
-        [item['payment_method'] for item in payment_method_revenue],
-        [float(item['revenue']) for item in payment_method_revenue],
-        'Revenue by Payment Method'
-    )
+    # Register charts; the images are rendered once per date range and data
+    # and served from their own cacheable URL
+    charts = register_charts('sales', start_date, end_date, {
+        'daily_chart': chart_spec(
+            'line',
+            [item['date'].strftime('%Y-%m-%d') for item in daily_revenue],
+            [item['revenue'] for item in daily_revenue],
+            'Daily Revenue',
+            'Date',
+            'Revenue ($)'
+        ),
+        'court_chart': chart_spec(
+            'bar',
+            [item['court__name'] for item in court_revenue],
+            [item['revenue'] for item in court_revenue],
+            'Revenue by Court',
+            'Court',
+            'Revenue ($)'
+        ),
+        'payment_chart': chart_spec(
+            'pie',
+            [item['payment_method_display'] for item in payment_method_revenue],
+            [item['revenue'] for item in payment_method_revenue],
+            'Revenue by Payment Method'
+        ),
+    })
     
     context = {
         'start_date': start_date.strftime('%Y-%m-%d'),
@@ -114,9 +96,9 @@ def sales_report(request):
         'monthly_revenue': monthly_revenue,
         'court_revenue': court_revenue,
         'payment_method_revenue': payment_method_revenue,
-        'daily_chart': daily_chart,
-        'court_chart': court_chart,
-        'payment_chart': payment_chart,
+        'daily_chart': charts['daily_chart'],
+        'court_chart': charts['court_chart'],
+        'payment_chart': charts['payment_chart'],
         'total_bookings_count': total_bookings_count,
         'avg_revenue_per_booking': avg_revenue_per_booking,
     }
@@ -132,28 +114,31 @@ def payroll_report(request, year=None, month=None):
     if month is None:
         month = timezone.now().month
     
-    # Get all active employees
-    employees = Employee.objects.filter(active=True)
+    # Hours and pay for every active employee in one aggregate query; the
+    # individual time entries are only loaded when a row is expanded
+    entries_in_month = Q(
+        **range_lookup('timeentry__clock_in', month_range(year, month)),
+        timeentry__clock_out__isnull=False
+    )
+    employees = Employee.objects.filter(active=True).annotate(
+        worked=Sum(
+            ExpressionWrapper(F('timeentry__clock_out') - F('timeentry__clock_in'), output_field=DurationField()),
+            filter=entries_in_month
+        ),
+        entries_count=Count('timeentry', filter=entries_in_month),
+    ).order_by('pk')
     
     employee_data = []
-    total_payroll = 0
+    total_payroll = Decimal('0.00')
     
     for employee in employees:
-        # Get time entries for the month
-        time_entries = TimeEntry.objects.filter(
-            employee=employee,
-            clock_in__year=year,
-            clock_in__month=month,
-            clock_out__isnull=False
-        )
-        
-        # Calculate total hours and pay
-        total_hours = sum(entry.duration_hours() for entry in time_entries)
-        total_pay = sum(entry.calculate_pay() for entry in time_entries)
+        seconds = Decimal(employee.worked.total_seconds()) if employee.worked else Decimal('0')
+        total_hours = seconds / 3600
+        total_pay = (total_hours * employee.hourly_rate).quantize(Decimal('0.01'))
         
         employee_data.append({
             'employee': employee,
-            'time_entries': time_entries,
+            'entries_count': employee.entries_count,
             'total_hours': total_hours,
             'total_pay': total_pay,
         })
@@ -174,6 +159,22 @@ def payroll_report(request, year=None, month=None):
     
     return render(request, 'court_management/payroll_report.html', context)
 
+@login_required
+@permission_required('court_management.view_employee', raise_exception=True)
+def payroll_time_entries(request, year, month, pk):
+    # Loaded on demand when an employee's entries are expanded in the payroll report
+    employee = get_object_or_404(Employee, pk=pk)
+    time_entries = TimeEntry.objects.filter(
+        employee=employee,
+        clock_out__isnull=False,
+        **range_lookup('clock_in', month_range(year, month))
+    ).select_related('employee').order_by('clock_in')
+    
+    return render(request, 'court_management/payroll_time_entries.html', {
+        'employee': employee,
+        'time_entries': time_entries,
+    })
+
 @login_required
 @permission_required('court_management.view_booking', raise_exception=True)
 def export_sales_report_csv(request):
@@ -187,103 +188,54 @@ def export_sales_report_csv(request):
         start_date = end_date - timedelta(days=30)
     
     # Get bookings within date range
-    bookings = Booking.objects.filter(
-        start_time__date__gte=start_date,
-        start_time__date__lte=end_date
+    bookings = Booking.objects.filter(**range_lookup('start_time', date_range(start_date, end_date)))
+    
+    # Stream the rows straight from a server-side cursor instead of
+    # building the whole file in memory
+    rows = bookings.order_by('start_time', 'id').values_list(
+        'id', 'customer__name', 'court__name', 'start_time', 'end_time',
+        'fee', 'payment_status', 'status'
+    ).iterator(chunk_size=CSV_EXPORT_CHUNK_SIZE)
+    
+    response = StreamingHttpResponse(
+        _sales_report_csv_rows(rows),
+        content_type='text/csv'
     )
-    
-    # Create DataFrame
-    data = {
-        'Booking ID': [booking.id for booking in bookings],
-        'Customer': [booking.customer.name for booking in bookings],
-        'Court': [booking.court.name for booking in bookings],
-        'Start Time': [booking.start_time.strftime('%Y-%m-%d %H:%M') for booking in bookings],
-        'End Time': [booking.end_time.strftime('%Y-%m-%d %H:%M') for booking in bookings],
-        'Duration (hours)': [booking.duration_hours() for booking in bookings],
-        'Fee': [float(booking.fee) for booking in bookings],
-        'Payment Status': [booking.payment_status for booking in bookings],
-        'Status': [booking.status for booking in bookings],
-    }
-    
-    df = pd.DataFrame(data)
-    
-    # Create HTTP response with CSV data
-    response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="sales_report_{start_date}_to_{end_date}.csv"'
     
-    df.to_csv(path_or_buf=response, index=False)
-    
     return response
 
-# Chart Generation Functions
-def generate_line_chart(x_data, y_data, title, x_label, y_label):
-    plt.figure(figsize=(10, 6))
-    plt.plot(x_data, y_data, marker='o')
-    plt.title(title)
-    plt.xlabel(x_label)
-    plt.ylabel(y_label)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    
-    # Convert plot to PNG image
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    
-    # Convert PNG image to base64 string
-    image_png = buffer.getvalue()
-    buffer.close()
-    
-    graphic = base64.b64encode(image_png)
-    graphic = graphic.decode('utf-8')
-    
-    plt.close()
-    
-    return graphic
+def _sales_report_csv_rows(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(SALES_REPORT_CSV_HEADER)
+    for booking_id, customer, court, start_time, end_time, fee, payment_status, status in rows:
+        yield writer.writerow([
+            booking_id,
+            customer,
+            court,
+            start_time.strftime('%Y-%m-%d %H:%M'),
+            end_time.strftime('%Y-%m-%d %H:%M'),
+            (end_time - start_time).total_seconds() / 3600,
+            float(fee),
+            payment_status,
+            status,
+        ])
 
-def generate_bar_chart(x_data, y_data, title, x_label, y_label):
-    plt.figure(figsize=(10, 6))
-    plt.bar(x_data, y_data)
-    plt.title(title)
-    plt.xlabel(x_label)
-    plt.ylabel(y_label)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    
-    # Convert plot to PNG image
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    
-    # Convert PNG image to base64 string
-    image_png = buffer.getvalue()
-    buffer.close()
-    
-    graphic = base64.b64encode(image_png)
-    graphic = graphic.decode('utf-8')
-    
-    plt.close()
-    
-    return graphic
+def _chart_etag(request, key, fmt):
+    return key
 
-def generate_pie_chart(labels, data, title):
-    plt.figure(figsize=(8, 8))
-    plt.pie(data, labels=labels, autopct='%1.1f%%')
-    plt.title(title)
-    
-    # Convert plot to PNG image
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    
-    # Convert PNG image to base64 string
-    image_png = buffer.getvalue()
-    buffer.close()
-    
-    graphic = base64.b64encode(image_png)
-    graphic = graphic.decode('utf-8')
-    
-    plt.close()
-    
-    return graphic
- 
\ No newline at end of file
+
+@login_required
+@permission_required('court_management.view_booking', raise_exception=True)
+@condition(etag_func=_chart_etag)
+def report_chart(request, key, fmt):
+    # The URL is a hash of the plotted data, so the image never changes
+    if fmt not in CHART_FORMATS:
+        raise Http404("Unknown chart format")
+    image = get_chart_image(key, fmt)
+    if image is None:
+        raise Http404("Chart not found")
+    
+    response = HttpResponse(image, content_type=CHART_FORMATS[fmt])
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
@@ -1,42 +1,210 @@
 # court_management/email_backend.py
+import logging
+import os
+import smtplib
 import ssl
+import threading
+import time
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 from django.conf import settings
 from django.core.mail.backends.smtp import EmailBackend as DjangoSMTPBackend
+from django.core.mail.message import sanitize_address
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_ssl_context(cert_path):
+    """SSL context for the mail server, built once per process and certificate path"""
+    cert_path = Path(cert_path)
+    if cert_path.exists():
+        ssl_context = ssl.create_default_context(cafile=str(cert_path))
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_REQUIRED
+        logger.info(f"Using SMTP certificate: {cert_path}")
+    else:
+        # Fallback: disable verification
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        logger.warning("SMTP certificate not found, using unverified SSL")
+    return ssl_context
+
+
+class _DataTrackingMixin:
+    """Records whether the message being sent has reached the DATA command"""
+    data_started = False
+
+    def mail(self, *args, **kwargs):
+        self.data_started = False
+        return super().mail(*args, **kwargs)
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+
+class TrackedSMTP(_DataTrackingMixin, smtplib.SMTP):
+    pass
+
+
+class TrackedSMTP_SSL(_DataTrackingMixin, smtplib.SMTP_SSL):
+    pass
+
+
+class SMTPConnectionPool:
+    """
+    Process-wide pool of authenticated SMTP connections, keyed by server and
+    account. Connections idle for longer than the timeout are closed instead
+    of reused, and the pool forgets inherited connections after a fork.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # Sockets inherited from the parent must not be shared
+            self._idle = {}
+            self._pid = os.getpid()
+
+    def acquire(self, key):
+        """An idle connection for the key that answers NOOP, or None"""
+        while True:
+            with self._lock:
+                self._check_fork()
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                connection, released_at = idle.pop()
+            if time.monotonic() - released_at > settings.EMAIL_POOL_IDLE_TIMEOUT:
+                self._close(connection)
+                continue
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(connection)
+
+    def release(self, key, connection):
+        try:
+            connection.rset()
+        except (smtplib.SMTPException, OSError):
+            self._close(connection)
+            return
+        with self._lock:
+            self._check_fork()
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < settings.EMAIL_POOL_SIZE:
+                idle.append((connection, time.monotonic()))
+                return
+        self._close(connection)
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _ in connections:
+                self._close(connection)
+
+    def _close(self, connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+
+connection_pool = SMTPConnectionPool()
 
 
 class CustomSMTPBackend(DjangoSMTPBackend):
+    """
+    SMTP backend trusting the bundled CA certificate and reusing logged-in
+    connections from the process-wide pool across send_messages() calls.
+    """
+
+    @property
+    def pool_key(self):
+        return (self.host, self.port, self.username, self.use_tls, self.use_ssl)
+
     def open(self):
         if self.connection:
             return False
-        
+
+        self.connection = connection_pool.acquire(self.pool_key)
+        if self.connection:
+            return True
+
         # Create SSL context with our certificate
-        cert_path = Path(settings.BASE_DIR) / 'certs' / 'ca.pem'
-        
-        if cert_path.exists():
-            ssl_context = ssl.create_default_context(cafile=str(cert_path))
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_REQUIRED
-            print(f"✅ Using certificate: {cert_path}")
-        else:
-            # Fallback: disable verification
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            print(f"⚠️ Certificate not found, using unverified SSL")
-        
+        ssl_context = get_ssl_context(str(Path(settings.BASE_DIR) / 'certs' / 'ca.pem'))
+
         try:
-            self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
-            
+            connection_params = {'timeout': self.timeout}
+            if self.use_ssl:
+                connection_params['context'] = ssl_context
+            self.connection = self.connection_class(self.host, self.port, **connection_params)
+
             if self.use_tls:
                 self.connection.starttls(context=ssl_context)
-            
+
             if self.username and self.password:
                 self.connection.login(self.username, self.password)
-            
+
             return True
         except Exception as e:
-            print(f"❌ SMTP Error: {e}")
+            logger.error(f"SMTP Error: {e}")
+            self.connection = None
             if not self.fail_silently:
                 raise
-            return False
\ No newline at end of file
+            return False
+
+    def close(self):
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        connection_pool.release(self.pool_key, connection)
+
+    @property
+    def connection_class(self):
+        return TrackedSMTP_SSL if self.use_ssl else TrackedSMTP
+
+    def _discard(self):
+        # A dropped connection goes back to neither the server nor the pool
+        connection, self.connection = self.connection, None
+        connection.close()
+
+    def _send(self, email_message):
+        if not email_message.recipients():
+            return False
+        if self.connection is None and not self.open():
+            # Dropped while sending an earlier message of the batch
+            return False
+        encoding = email_message.encoding or settings.DEFAULT_CHARSET
+        from_email = sanitize_address(email_message.from_email, encoding)
+        recipients = [sanitize_address(addr, encoding) for addr in email_message.recipients()]
+        message = email_message.message().as_bytes(linesep='\r\n')
+        try:
+            for attempt in range(2):
+                try:
+                    self.connection.sendmail(from_email, recipients, message)
+                    return True
+                except smtplib.SMTPServerDisconnected:
+                    reached_data = getattr(self.connection, 'data_started', True)
+                    self._discard()
+                    # Once DATA was sent the server may have accepted the
+                    # message before dropping, and a retry could deliver it twice
+                    if attempt or reached_data:
+                        raise
+                    # The server dropped a pooled connection after its health check
+                    logger.warning("SMTP connection dropped before the message was sent, reconnecting")
+                    if not self.open():
+                        return False
+        except smtplib.SMTPException:
+            if not self.fail_silently:
+                raise
+            return False
@@ -0,0 +1,24 @@
+# court_management/management/commands/rebuild_revenue_rollup.py
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from court_management.components.services import rebuild_revenue_rollup
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue rollup from bookings and payments (all history by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end-date', help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = self._parse_date(options['start_date'])
+            end_date = self._parse_date(options['end_date'])
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+        
+        rows = rebuild_revenue_rollup(start_date=start_date, end_date=end_date)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt revenue rollup: {rows} rows"))
+
+    def _parse_date(self, value):
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
@@ -0,0 +1,23 @@
+# court_management/middleware.py
+
+from .components.services import get_user_role
+
+
+class UserRoleMiddleware:
+    """
+    Resolve the signed-in user's role once per request.
+    
+    Sets request.is_customer and request.customer (the user's Customer
+    profile, or None) so views, forms and admin classes don't each query the
+    group membership and profile again. Must come after
+    AuthenticationMiddleware.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        role = get_user_role(getattr(request, 'user', None))
+        request.is_customer = role.is_customer
+        request.customer = role.customer
+        return self.get_response(request)
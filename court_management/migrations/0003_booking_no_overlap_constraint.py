@@ -0,0 +1,72 @@
+# Exclusion constraint preventing overlapping active bookings on a court.
+#
+# Only PostgreSQL supports exclusion constraints, so the operations are no-ops
+# on other backends, where Booking.objects.reserve() serializes reservations
+# in a transaction instead. Existing overlaps would make ADD CONSTRAINT fail
+# with only the first conflicting row, so they are listed up front and have
+# to be cancelled or moved before the migration can run.
+
+from django.db import migrations
+
+ADD_CONSTRAINT_SQL = [
+    # btree_gist provides the gist equality operator class for court_id
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE court_management_booking
+        ADD CONSTRAINT booking_no_overlap
+        EXCLUDE USING gist (
+            court_id WITH =,
+            tstzrange(start_time, end_time, '[)') WITH &&
+        )
+        WHERE (status IN ('pending', 'confirmed', 'in_progress'))
+    """,
+]
+
+OVERLAPPING_BOOKINGS_SQL = """
+    SELECT a.id, b.id
+    FROM court_management_booking a
+    JOIN court_management_booking b
+        ON a.court_id = b.court_id
+        AND a.id < b.id
+        AND a.start_time < b.end_time
+        AND b.start_time < a.end_time
+    WHERE a.status IN ('pending', 'confirmed', 'in_progress')
+        AND b.status IN ('pending', 'confirmed', 'in_progress')
+    ORDER BY a.id, b.id
+"""
+
+DROP_CONSTRAINT_SQL = [
+    "ALTER TABLE court_management_booking DROP CONSTRAINT IF EXISTS booking_no_overlap",
+]
+
+
+def add_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(OVERLAPPING_BOOKINGS_SQL)
+            overlaps = cursor.fetchall()
+        if overlaps:
+            pairs = ', '.join(f'{first} and {second}' for first, second in overlaps)
+            raise RuntimeError(
+                f"Cannot add booking_no_overlap: these active bookings overlap on the same court: {pairs}. "
+                "Cancel or move one of each pair, then run the migration again."
+            )
+        for sql in ADD_CONSTRAINT_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in DROP_CONSTRAINT_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('court_management', '0002_alter_booking_options_alter_court_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_constraint, drop_constraint),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('court_management', '0003_booking_no_overlap_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_method', models.CharField(blank=True, max_length=10)),
+                ('bookings_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('booking_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('payments_count', models.PositiveIntegerField(default=0)),
+                ('payment_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('court', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='court_management.court')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'court', 'payment_method'), name='daily_revenue_rollup_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('court_management', '0006_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped')], max_length=10)),
+                ('started_at', models.DateTimeField()),
+                ('duration', models.FloatField(default=0, help_text='Seconds')),
+                ('rows_touched', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task_name', 'started_at'], name='task_run_name_started_idx'), models.Index(fields=['started_at'], name='task_run_started_idx')],
+            },
+        ),
+    ]
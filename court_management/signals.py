@@ -1,10 +1,16 @@
 # court_management/signals.py
 
+from django.db import transaction
 from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.conf import settings
 from allauth.account.signals import email_confirmed
+from .components.models import Booking, Court, Customer, Employee, Payment, bookings_updated
+from .components.services import (
+    booking_index, invalidate_availability, invalidate_user_role, invalidate_all_user_roles,
+    model_tag, invalidate_tags, schedule_revenue_rollup_refresh, enqueue_email, schedule_booking_transitions,
+)
 
 User = get_user_model()
 
@@ -31,14 +37,113 @@ def send_welcome_email_after_confirmation(request, email_address, **kwargs):
     The Badminton Court Management Team
     """
     
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-        )
-        print(f"Welcome email sent to {user.email}")
-    except Exception as e:
-        print(f"Failed to send welcome email: {e}")
\ No newline at end of file
+    # Queued in the outbox so a slow mail server does not hold up the request
+    enqueue_email(subject, message, [user.email], idempotency_key=f'welcome:{user.pk}')
+
+# Keep the in-memory court availability index in step with booking writes
+@receiver(post_save, sender=Booking)
+def update_booking_index_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_loaded_values', {})
+    booking_index.booking_saved(instance, previous_court_id=previous.get('court_id'))
+
+
+@receiver(post_delete, sender=Booking)
+def update_booking_index_on_delete(sender, instance, **kwargs):
+    booking_index.booking_deleted(instance)
+
+
+# Enqueue timed status transitions when a booking is confirmed, and again when its times change
+@receiver(post_save, sender=Booking)
+def schedule_transitions_on_save(sender, instance, **kwargs):
+    if instance.status not in ('confirmed', 'in_progress'):
+        return
+    previous = getattr(instance, '_loaded_values', {})
+    if previous and all(previous.get(field) == getattr(instance, field) for field in ('status', 'start_time', 'end_time')):
+        return
+    transaction.on_commit(lambda: schedule_booking_transitions(instance))
+
+
+# Drop cached court availability for the courts a booking was on before and after the write
+@receiver(post_save, sender=Booking)
+def invalidate_availability_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_loaded_values', {})
+    invalidate_availability(previous.get('court_id'), instance.court_id)
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_availability_on_delete(sender, instance, **kwargs):
+    invalidate_availability(instance.court_id)
+
+
+# Queryset updates bypass the save signals above, so drop everything cached for the courts they touched
+@receiver(bookings_updated, sender=Booking)
+def invalidate_courts_on_booking_update(sender, court_ids, **kwargs):
+    booking_index.courts_changed(*court_ids)
+    invalidate_availability(*court_ids)
+    transaction.on_commit(lambda: invalidate_tags(model_tag(sender)))
+
+
+# Drop cached user roles when group membership, groups or customer profiles change
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_role_on_group_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.__dict__.pop('_court_role', None)
+        invalidate_user_role(instance.pk)
+    elif pk_set:
+        invalidate_user_role(*pk_set)
+    else:
+        # group.user_set.clear() does not say which users were removed
+        invalidate_all_user_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_roles_on_group_change(sender, instance, **kwargs):
+    invalidate_all_user_roles()
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_role_on_customer_change(sender, instance, **kwargs):
+    # A profile moved to another user leaves the previous one without it
+    previous = getattr(instance, '_loaded_values', {})
+    invalidate_user_role(*{previous.get('user_id'), instance.user_id})
+
+
+# Drop cached entries derived from a model (dashboard figures, court availability) when its rows change
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Court)
+@receiver(post_delete, sender=Court)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_model_cache_tag_on_change(sender, instance, **kwargs):
+    # On commit: a value recomputed before then still reads the old rows
+    transaction.on_commit(lambda: invalidate_tags(model_tag(sender)))
+
+
+# Keep the daily revenue rollup current for the day and court a booking or payment lands on
+@receiver(post_save, sender=Booking)
+def refresh_revenue_rollup_on_booking_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_loaded_values', {})
+    if previous and (previous.get('court_id'), previous.get('start_time')) != (instance.court_id, instance.start_time):
+        schedule_revenue_rollup_refresh(previous['court_id'], previous['start_time'])
+    schedule_revenue_rollup_refresh(instance.court_id, instance.start_time)
+
+
+@receiver(post_delete, sender=Booking)
+def refresh_revenue_rollup_on_booking_delete(sender, instance, **kwargs):
+    schedule_revenue_rollup_refresh(instance.court_id, instance.start_time)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_revenue_rollup_on_payment_change(sender, instance, **kwargs):
+    # Looked up by id: the booking may already be gone when a delete cascades
+    booking = Booking.objects.filter(pk=instance.booking_id).values('court_id', 'start_time').first()
+    if booking:
+        schedule_revenue_rollup_refresh(booking['court_id'], booking['start_time'])
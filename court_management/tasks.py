@@ -1,120 +1,246 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import get_connection, EmailMessage, EmailMultiAlternatives
+from django.db.models import Count, Q, Sum
+from django.template.loader import render_to_string
 from django.utils import timezone
 from django.conf import settings
-from .models import Booking
+from .components.models import Booking, Employee
+from .components.services import (
+    day_range, date_range, range_lookup, revenue_summary, tracked_task_run, prune_task_runs,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 @shared_task
+@tracked_task_run(lock_timeout=300)
 def check_booking_end_times():
     """
     Check for bookings that are ending soon and send notifications
     """
     now = timezone.now()
     threshold = now + timezone.timedelta(minutes=15)  # 15 minutes before end
+    batch_size = settings.BOOKING_NOTIFICATION_BATCH_SIZE
     
-    upcoming_end_bookings = Booking.objects.filter(
+    # Bounded per run so a backlog cannot hold up the beat schedule; whatever
+    # is left over is picked up by the next run
+    booking_ids = list(Booking.objects.filter(
         end_time__lte=threshold,
         end_time__gt=now,
         status='in_progress',
         notified=False
-    )
+    ).order_by('end_time', 'id').values_list('id', flat=True)[:batch_size * settings.BOOKING_NOTIFICATION_MAX_BATCHES])
+    
+    processed = 0
+    for start in range(0, len(booking_ids), batch_size):
+        processed += _notify_booking_end_batch(booking_ids[start:start + batch_size])
+    
+    logger.info(f"Processed {processed} bookings")
+    return processed
+
+def _notify_booking_end_batch(booking_ids):
+    """
+    Email one batch of bookings over a single SMTP connection and mark the
+    ones handled as notified with one update. Returns the number marked.
+    """
+    bookings = Booking.objects.filter(pk__in=booking_ids).select_related('customer', 'court')
+    
+    notified_ids = []
+    messages = []
+    for booking in bookings:
+        if booking.customer.email:
+            messages.append((booking.id, EmailMessage(
+                'Your booking time is ending soon',
+                f'Dear {booking.customer.name},\n\nYour booking at {booking.court.name} will end in 15 minutes at {booking.end_time.strftime("%Y-%m-%d %H:%M")}.\n\nPlease finish your game on time.\n\nThank you,\nBadminton Court Management',
+                settings.DEFAULT_FROM_EMAIL,
+                [booking.customer.email],
+            )))
+        else:
+            notified_ids.append(booking.id)
     
-    for booking in upcoming_end_bookings:
+    if messages:
         try:
-            # Send email notification if customer has email
-            if booking.customer.email:
-                send_mail(
-                    'Your booking time is ending soon',
-                    f'Dear {booking.customer.name},\n\nYour booking at {booking.court.name} will end in 15 minutes at {booking.end_time.strftime("%Y-%m-%d %H:%M")}.\n\nPlease finish your game on time.\n\nThank you,\nBadminton Court Management',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [booking.customer.email],
-                    fail_silently=False,
-                )
-            
-            # Mark booking as notified
-            booking.notified = True
-            booking.save()
-            
-            logger.info(f"Sent notification for booking {booking.id}")
+            with get_connection(fail_silently=False) as connection:
+                for booking_id, message in messages:
+                    # One message per call so a rejected address does not
+                    # hide which of the others went out
+                    try:
+                        connection.send_messages([message])
+                        notified_ids.append(booking_id)
+                        logger.info(f"Sent notification for booking {booking_id}")
+                    except Exception as e:
+                        logger.error(f"Error sending notification for booking {booking_id}: {str(e)}")
         except Exception as e:
-            logger.error(f"Error sending notification for booking {booking.id}: {str(e)}")
+            logger.error(f"Error opening mail connection for booking notifications: {str(e)}")
     
-    return f"Processed {upcoming_end_bookings.count()} bookings"
+    return Booking.objects.filter(pk__in=notified_ids, notified=False).update(notified=True)
 
 @shared_task
+@tracked_task_run(lock_timeout=300)
 def update_booking_status():
     """
-    Update booking status based on current time
+    Safety net behind the per-booking transition tasks: apply transitions that
+    were missed and schedule the ones coming up
     """
-    now = timezone.now()
-    
-    # Update bookings to 'in_progress' if start time has passed
-    Booking.objects.filter(
-        start_time__lte=now,
-        end_time__gt=now,
-        status='confirmed'
-    ).update(status='in_progress')
+    from .components.services.booking_transitions import sweep_booking_transitions
     
-    # Update bookings to 'completed' if end time has passed
-    Booking.objects.filter(
-        end_time__lte=now,
-        status='in_progress'
-    ).update(status='completed')
+    return sweep_booking_transitions(settings.BOOKING_TRANSITION_SWEEP_WINDOW)
+
+@shared_task
+def transition_booking_status(booking_id, target, stamp):
+    """
+    Move one booking to in_progress or completed at its start or end time
+    """
+    from .components.services.booking_transitions import apply_booking_transition
     
-    return "Booking statuses updated"
+    return apply_booking_transition(booking_id, target, stamp)
 
 @shared_task
+@tracked_task_run(lock_timeout=600)
 def send_daily_report():
     """
-    Send daily report to manager
+    Send daily report to managers
     """
-    today = timezone.now().date()
+    today = timezone.localdate()
     tomorrow = today + timezone.timedelta(days=1)
     
-    # Get today's bookings
-    bookings = Booking.objects.filter(
-        start_time__date=today
-    )
+    managers = [
+        manager for manager in Employee.objects.filter(position='manager', active=True).only('name', 'email')
+        if manager.email
+    ]
+    if not managers:
+        return 0
     
-    # Calculate statistics
-    total_bookings = bookings.count()
-    completed_bookings = bookings.filter(status='completed').count()
-    total_revenue = bookings.aggregate(total=Sum('fee'))['total'] or 0
+    # Today's figures and tomorrow's count in one pass over the bookings of both days
+    _, tomorrow_start = day_range(today)
+    is_today = Q(start_time__lt=tomorrow_start)
+    stats = Booking.objects.filter(**range_lookup('start_time', date_range(today, tomorrow))).aggregate(
+        total_bookings_count=Count('id', filter=is_today),
+        completed_bookings_count=Count('id', filter=is_today & Q(status='completed')),
+        total_revenue=Sum('fee', filter=is_today),
+        tomorrow_bookings=Count('id', filter=~is_today),
+    )
+    stats['total_revenue'] = stats['total_revenue'] or Decimal('0.00')
+    # The per-court and payment-method breakdowns come from the revenue rollup
+    summary = revenue_summary(today, today)
     
-    # Get tomorrow's bookings
-    tomorrow_bookings = Booking.objects.filter(
-        start_time__date=tomorrow
-    ).count()
+    # Both parts are rendered once, from the same figures, and shared by every manager's copy
+    context = {
+        'report_date': today,
+        **stats,
+        'court_revenue': summary['court_revenue'],
+        'payment_method_revenue': summary['payment_method_revenue'],
+    }
+    subject = f'Daily Report - {today.strftime("%Y-%m-%d")}'
+    report_content = render_to_string('court_management/emails/daily_report.txt', context)
+    report_html = render_to_string('court_management/emails/daily_report.html', context)
     
-    # Create report content
-    report_content = f"""
-    Daily Report - {today.strftime('%Y-%m-%d')}
+    sent = 0
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for manager in managers:
+                message = EmailMultiAlternatives(
+                    subject, report_content, settings.DEFAULT_FROM_EMAIL, [manager.email],
+                    connection=connection,
+                )
+                message.attach_alternative(report_html, 'text/html')
+                try:
+                    message.send()
+                    sent += 1
+                    logger.info(f"Sent daily report to {manager.name}")
+                except Exception as e:
+                    logger.error(f"Error sending daily report to {manager.name}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error opening mail connection for the daily report: {str(e)}")
     
-    Today's Bookings: {total_bookings}
-    Completed Bookings: {completed_bookings}
-    Total Revenue: ${total_revenue}
+    return sent
+
+@shared_task
+def render_charts(keys):
+    """
+    Render registered report charts into the cache
+    """
+    from .components.services.charts import render_registered_charts
     
-    Tomorrow's Bookings: {tomorrow_bookings}
+    rendered = render_registered_charts(keys)
+    return f"Rendered {rendered} charts"
+
+@shared_task
+@tracked_task_run(lock_timeout=3600)
+def reconcile_revenue_rollup(days=None):
+    """
+    Rebuild the daily revenue rollup from bookings and payments, catching
+    anything the incremental updates missed (bulk updates, raw SQL, moved payments)
     """
+    from .components.services.revenue import rebuild_revenue_rollup
     
-    # Get manager email
-    managers = Employee.objects.filter(position='manager', active=True)
+    if days is None:
+        days = settings.REVENUE_ROLLUP_RECONCILE_DAYS
+    start_date = timezone.localdate() - timezone.timedelta(days=days) if days else None
     
-    for manager in managers:
-        if manager.email:
-            try:
-                send_mail(
-                    f'Daily Report - {today.strftime("%Y-%m-%d")}',
-                    report_content,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [manager.email],
-                    fail_silently=False,
-                )
-                logger.info(f"Sent daily report to {manager.name}")
-            except Exception as e:
-                logger.error(f"Error sending daily report to {manager.name}: {str(e)}")
+    rows = rebuild_revenue_rollup(start_date=start_date)
+    logger.info(f"Reconciled revenue rollup: {rows} rows")
+    return rows
+
+@shared_task
+def refresh_revenue_rollup_day(court_id, day):
+    """
+    Recompute the revenue rollup of one court and day after a booking or payment write
+    """
+    from .components.services.revenue import refresh_revenue_rollup
+    
+    return refresh_revenue_rollup(court_id, date.fromisoformat(day))
+
+@shared_task
+def deliver_outbound_emails():
+    """
+    Drain the email outbox in batches
+    """
+    from .components.services.outbox import deliver_pending_emails
     
-    return "Daily report sent"
\ No newline at end of file
+    claimed = 0
+    for _ in range(settings.OUTBOX_MAX_BATCHES):
+        batch = deliver_pending_emails(settings.OUTBOX_BATCH_SIZE)
+        claimed += batch
+        if batch < settings.OUTBOX_BATCH_SIZE:
+            break
+    return f"Processed {claimed} outbound emails"
+
+@shared_task
+@tracked_task_run(lock_timeout=600)
+def prune_task_runs_history():
+    """
+    Delete task run records older than TASK_RUN_RETENTION_DAYS
+    """
+    deleted = prune_task_runs(settings.TASK_RUN_RETENTION_DAYS)
+    logger.info(f"Pruned {deleted} task runs")
+    return deleted
+
+
+@shared_task
+@tracked_task_run(lock_timeout=3600)
+def clear_expired_sessions():
+    """
+    Delete expired sessions in batches so the session table stays small
+    """
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    if not hasattr(store, 'get_model_class'):
+        # Cookie and cache sessions expire on their own
+        store.clear_expired()
+        return 0
+
+    model = store.get_model_class()
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(model.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:settings.SESSION_CLEANUP_BATCH_SIZE])
+        if not keys:
+            break
+        batch, _ = model.objects.filter(pk__in=keys).delete()
+        deleted += batch
+    logger.info(f"Cleared {deleted} expired sessions")
+    return deleted
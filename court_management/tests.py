@@ -1,3 +1,952 @@
-from django.test import TestCase
+import os
+import smtplib
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.core.cache import cache, caches
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.contrib.sessions.models import Session
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from badminton_court.cache import TwoTierCache
+from badminton_court.sessions import SessionStore
+
+from .components.models import (
+    Booking, BookingConflictError, Court, Customer, DailyRevenueRollup, Employee, OutboundEmail, Payment,
+    TimeEntry,
+)
+from .components.services import (
+    availability, booking_index, court_availability, enqueue_email, invalidate_tags, refresh_revenue_rollup,
+    task_lock,
+)
+from .components.services.booking_transitions import (
+    _stamp, apply_booking_transition, schedule_booking_transitions, sweep_booking_transitions,
+)
+from .components.services.outbox import deliver_pending_emails
+from .components.services.booking_index import CourtIntervals, Interval, _version_key
+from .components.services.roles import CUSTOMERS_GROUP
+from .email_backend import CustomSMTPBackend, connection_pool
+from .tasks import clear_expired_sessions, send_daily_report
+from .middleware import UserRoleMiddleware
 
 # Create your tests here.
+
+@skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'Query plans are only checked on PostgreSQL and SQLite')
+class QueryPlanTests(TestCase):
+    """
+    The hot booking, payment and time entry filters must be answerable from
+    the indexes declared on the models. On PostgreSQL sequential scans are
+    disabled so the planner picks an index whenever one applies, even on tiny
+    test tables; SQLite uses any index that applies on its own.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.court = Court.objects.create(name='Court 1', hourly_rate=Decimal('10.00'))
+        customer = Customer.objects.create(name='Customer', phone='123')
+        cls.booking = Booking.objects.create(
+            customer=customer, court=cls.court,
+            start_time=now, end_time=now + timedelta(hours=1), fee=Decimal('10.00')
+        )
+        Payment.objects.create(booking=cls.booking, amount=Decimal('10.00'), payment_method='cash')
+        cls.employee = Employee.objects.create(
+            name='Employee', position='attendant', phone='123',
+            hire_date=now.date(), hourly_rate=Decimal('10.00')
+        )
+        TimeEntry.objects.create(employee=cls.employee, clock_in=now)
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"Expected {index_name} in plan:\n{plan}")
+
+    def test_declared_indexes_exist(self):
+        for model in (Booking, Payment, TimeEntry):
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+            for index in model._meta.indexes:
+                self.assertIn(index.name, constraints)
+                self.assertTrue(constraints[index.name]['index'])
+
+    def test_court_overlap_check(self):
+        now = timezone.now()
+        self.assertUsesIndex(
+            Booking.objects.filter(
+                court=self.court, start_time__lt=now + timedelta(hours=2),
+                end_time__gt=now, status__in=Booking.ACTIVE_STATUSES
+            ),
+            'booking_court_time_idx'
+        )
+
+    def test_status_sweep(self):
+        self.assertUsesIndex(
+            Booking.objects.filter(status='in_progress', end_time__lte=timezone.now()),
+            'booking_status_end_idx'
+        )
+
+    def test_unnotified_bookings_ending_soon(self):
+        now = timezone.now()
+        self.assertUsesIndex(
+            Booking.objects.filter(
+                end_time__lte=now + timedelta(minutes=15), end_time__gt=now,
+                status='in_progress', notified=False
+            ),
+            # Without table statistics SQLite cannot tell the partial index is the smaller one
+            'booking_end_unnotified_idx' if connection.vendor == 'postgresql' else 'booking_status_end_idx'
+        )
+
+    def test_bookings_in_date_range(self):
+        now = timezone.now()
+        self.assertUsesIndex(
+            Booking.objects.filter(start_time__gte=now - timedelta(days=30), start_time__lt=now),
+            'booking_start_time_idx'
+        )
+
+    def test_open_time_entry(self):
+        self.assertUsesIndex(
+            TimeEntry.objects.filter(employee=self.employee, clock_out__isnull=True),
+            'timeentry_open_idx'
+        )
+
+    def test_payments_of_booking(self):
+        self.assertUsesIndex(
+            Payment.objects.filter(booking=self.booking).values('payment_method'),
+            'payment_booking_method_idx'
+        )
+
+
+class ImportTimeTests(SimpleTestCase):
+    """
+    Every web worker, Celery worker and management command imports the views,
+    URLs and tasks at startup. The plotting and dataframe stack belongs to the
+    report code paths only, and the whole import must stay within budget.
+    """
+    # Milliseconds of cumulative top-level import time, measured by python -X importtime
+    IMPORT_TIME_BUDGET_MS = int(os.getenv('IMPORT_TIME_BUDGET_MS', '1500'))
+    HEAVY_MODULES = ('matplotlib', 'pandas', 'numpy')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'import django; django.setup(); '
+             'import court_management.urls, court_management.views, court_management.tasks'],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True, check=True,
+        )
+        # Lines look like "import time: self [us] | cumulative | <indent>package"
+        cls.imports = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            cls.imports[name.strip()] = (int(cumulative), not name[1:].startswith(' '))
+
+    def test_heavy_modules_not_imported(self):
+        heavy = sorted(name for name in self.imports if name.split('.')[0] in self.HEAVY_MODULES)
+        self.assertEqual(heavy, [], "Import these lazily inside the code that needs them")
+
+    def test_import_time_within_budget(self):
+        total_ms = sum(cumulative for cumulative, top_level in self.imports.values() if top_level) / 1000
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:10]
+        self.assertLessEqual(
+            total_ms, self.IMPORT_TIME_BUDGET_MS,
+            "Startup imports took {:.0f} ms; slowest:\n{}".format(
+                total_ms, '\n'.join(f'{cumulative / 1000:8.1f} ms  {name}' for name, (cumulative, _) in slowest)
+            )
+        )
+
+
+class CourtIntervalsTests(SimpleTestCase):
+    def setUp(self):
+        self.base = timezone.now()
+        self.intervals = CourtIntervals([
+            self.interval(0, 1, 1),
+            self.interval(2, 4, 2),
+        ], self.base - timedelta(days=1), 0)
+
+    def interval(self, start, end, booking_id):
+        return Interval(self.base + timedelta(hours=start), self.base + timedelta(hours=end), booking_id)
+
+    def find(self, start, end, exclude_pk=None):
+        slot = self.interval(start, end, None)
+        return self.intervals.find_conflict(slot.start_time, slot.end_time, exclude_pk)
+
+    def test_adjacent_slots_do_not_conflict(self):
+        self.assertIsNone(self.find(1, 2))
+        self.assertIsNone(self.find(4, 5))
+        self.assertIsNone(self.find(-1, 0))
+
+    def test_overlapping_slots_conflict(self):
+        self.assertEqual(self.find(0.5, 1.5).booking_id, 1)
+        self.assertEqual(self.find(3, 3.5).booking_id, 2)
+        self.assertEqual(self.find(-1, 5).booking_id, 2)
+
+    def test_excluded_booking_is_ignored(self):
+        self.assertIsNone(self.find(2, 4, exclude_pk=2))
+        self.assertEqual(self.find(0, 4, exclude_pk=2).booking_id, 1)
+
+    def test_add_and_remove_keep_order(self):
+        self.intervals.add(self.interval(1, 2, 3))
+        self.assertEqual(self.find(1.5, 1.75).booking_id, 3)
+        # Re-adding a booking moves it rather than duplicating it
+        self.intervals.add(self.interval(5, 6, 3))
+        self.assertEqual(len(self.intervals), 3)
+        self.assertIsNone(self.find(1, 2))
+        self.assertEqual(self.find(5, 7).booking_id, 3)
+        self.intervals.remove(2)
+        self.assertIsNone(self.find(2, 4))
+        self.assertEqual(self.find(0, 10).booking_id, 3)
+
+
+class BookingIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.court = Court.objects.create(name='Court 1', hourly_rate=Decimal('10.00'))
+        cls.other_court = Court.objects.create(name='Court 2', hourly_rate=Decimal('10.00'))
+        cls.customer = Customer.objects.create(name='Customer', phone='123')
+
+    def setUp(self):
+        cache.clear()
+        booking_index.clear()
+        self.start = timezone.now() + timedelta(days=1)
+        self.end = self.start + timedelta(hours=1)
+
+    def book(self, court):
+        return Booking(
+            customer=self.customer, court=court, start_time=self.start,
+            end_time=self.end, fee=Decimal('10.00'), status='confirmed'
+        )
+
+    def test_conflicts_are_per_court(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(self.court)
+            booking.save()
+        self.assertEqual(booking_index.find_conflict(self.court.pk, self.start, self.end).booking_id, booking.pk)
+        self.assertIsNone(booking_index.find_conflict(self.other_court.pk, self.start, self.end))
+
+    def test_moving_court_updates_both_courts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(self.court)
+            booking.save()
+        booking = Booking.objects.get(pk=booking.pk)
+        self.assertIsNotNone(booking_index.find_conflict(self.court.pk, self.start, self.end))
+        self.assertIsNone(booking_index.find_conflict(self.other_court.pk, self.start, self.end))
+        version = cache.get(_version_key(self.court.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.court = self.other_court
+            booking.save()
+        self.assertIsNone(booking_index.find_conflict(self.court.pk, self.start, self.end))
+        self.assertEqual(booking_index.find_conflict(self.other_court.pk, self.start, self.end).booking_id, booking.pk)
+        # Other processes holding the old court reload it
+        self.assertGreater(cache.get(_version_key(self.court.pk)), version)
+
+    def test_write_by_another_process_is_not_skipped(self):
+        self.assertIsNone(booking_index.find_conflict(self.court.pk, self.start, self.end))
+        # Another process books the slot and bumps the court's version
+        Booking.objects.bulk_create([self.book(self.court)])
+        booking_index._bump_version(self.court.pk)
+        later = self.start + timedelta(hours=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(self.court)
+            booking.start_time, booking.end_time = later, later + timedelta(hours=1)
+            booking.save()
+        # The local copy is reloaded rather than moved past the other write
+        self.assertIsNotNone(booking_index.find_conflict(self.court.pk, self.start, self.end))
+        self.assertEqual(booking_index.find_conflict(self.court.pk, later, later + timedelta(hours=1)).booking_id, booking.pk)
+
+    def test_rolled_back_save_is_not_indexed(self):
+        self.assertIsNone(booking_index.find_conflict(self.court.pk, self.start, self.end))
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.book(self.court).save()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertIsNone(booking_index.find_conflict(self.court.pk, self.start, self.end))
+
+
+class ReserveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.court = Court.objects.create(name='Court 1', hourly_rate=Decimal('10.00'))
+        cls.customer = Customer.objects.create(name='Customer', phone='123')
+
+    def setUp(self):
+        self.start = timezone.now() + timedelta(days=1)
+        self.end = self.start + timedelta(hours=1)
+        self.booking = Booking.objects.reserve(self.court, self.start, self.end, self.customer, status='confirmed')
+
+    def test_overlapping_reservation_conflicts(self):
+        with self.assertRaises(BookingConflictError):
+            Booking.objects.reserve(
+                self.court, self.start + timedelta(minutes=30), self.end + timedelta(minutes=30), self.customer
+            )
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_back_to_back_reservation_succeeds(self):
+        booking = Booking.objects.reserve(self.court, self.end, self.end + timedelta(hours=1), self.customer)
+        self.assertEqual(booking.fee, Decimal('10.00'))
+        Booking.objects.reserve(self.court, self.start - timedelta(hours=1), self.start, self.customer)
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_cancelled_booking_frees_the_slot(self):
+        Booking.objects.filter(pk=self.booking.pk).update(status='cancelled')
+        Booking.objects.reserve(self.court, self.start, self.end, self.customer)
+
+    @skipUnless(connection.vendor != 'postgresql', 'PostgreSQL relies on the exclusion constraint instead')
+    def test_court_row_is_locked_before_checking(self):
+        with CaptureQueriesContext(connection) as queries:
+            Booking.objects.reserve(self.court, self.end, self.end + timedelta(hours=1), self.customer)
+        statements = [query['sql'] for query in queries.captured_queries]
+        quote = connection.ops.quote_name
+        lock = next(i for i, sql in enumerate(statements) if sql.startswith(f'UPDATE {quote(Court._meta.db_table)}'))
+        check = next(i for i, sql in enumerate(statements) if sql.startswith(f'SELECT 1 AS {quote("a")}'))
+        insert = next(i for i, sql in enumerate(statements) if sql.startswith(f'INSERT INTO {quote(Booking._meta.db_table)}'))
+        self.assertLess(lock, check)
+        self.assertLess(check, insert)
+
+    @skipUnless(connection.vendor != 'postgresql', 'The exclusion constraint keeps overlapping rows out')
+    def test_constraint_migration_lists_existing_overlaps(self):
+        migration = import_module('court_management.migrations.0003_booking_no_overlap_constraint')
+        overlap = Booking.objects.create(
+            customer=self.customer, court=self.court, start_time=self.start + timedelta(minutes=30),
+            end_time=self.end + timedelta(minutes=30), fee=Decimal('10.00'), status='pending',
+        )
+        Booking.objects.create(
+            customer=self.customer, court=self.court, start_time=self.start, end_time=self.end,
+            fee=Decimal('10.00'), status='cancelled',
+        )
+        schema_editor = mock.Mock(connection=mock.Mock(vendor='postgresql', cursor=connection.cursor))
+        with self.assertRaisesMessage(RuntimeError, f'{self.booking.pk} and {overlap.pk}.'):
+            migration.add_constraint(None, schema_editor)
+        schema_editor.execute.assert_not_called()
+
+
+class AvailabilityCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.court = Court.objects.create(name='Court 1', hourly_rate=Decimal('10.00'))
+        cls.customer = Customer.objects.create(name='Customer', phone='123')
+
+    def setUp(self):
+        cache.clear()
+        self.day = timezone.localdate() + timedelta(days=1)
+        opens, _ = availability._day_window(self.day)
+        self.start = opens + timedelta(hours=1)
+        self.booking = Booking.objects.create(
+            customer=self.customer, court=self.court, start_time=self.start,
+            end_time=self.start + timedelta(hours=1), fee=Decimal('10.00'), status='confirmed'
+        )
+
+    def busy(self):
+        return court_availability(self.day)[0]['days'][0]['busy']
+
+    def test_served_from_cache(self):
+        self.assertEqual(len(self.busy()), 1)
+        # Only the active courts are read
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.busy()), 1)
+
+    def test_save_invalidates_on_commit(self):
+        self.busy()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.status = 'cancelled'
+            self.booking.save()
+        self.assertEqual(self.busy(), [])
+
+    def test_queryset_update_invalidates(self):
+        self.busy()
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.filter(pk=self.booking.pk).update(status='cancelled')
+        self.assertEqual(self.busy(), [])
+
+    def test_result_computed_across_an_invalidation_is_not_served(self):
+        compute = availability._compute
+
+        def invalidated_meanwhile(slots):
+            computed = compute(slots)
+            invalidate_tags(availability._court_tag(self.court.pk))
+            return computed
+
+        with mock.patch.object(availability, '_compute', side_effect=invalidated_meanwhile):
+            self.busy()
+        with self.assertNumQueries(2):
+            self.busy()
+
+
+class UserRoleMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(name=CUSTOMERS_GROUP)
+        cls.user = User.objects.create_user('player', password='secret')
+        cls.user.groups.add(cls.group)
+        cls.other_user = User.objects.create_user('other', password='secret')
+        cls.customer = Customer.objects.create(name='Player', phone='123', user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.middleware = UserRoleMiddleware(lambda request: HttpResponse())
+
+    def request_as(self, user):
+        request = RequestFactory().get('/')
+        # A fresh user object per request, as AuthenticationMiddleware loads it
+        request.user = User.objects.get(pk=user.pk) if user.is_authenticated else user
+        self.middleware(request)
+        return request
+
+    def test_anonymous_user(self):
+        with self.assertNumQueries(0):
+            request = self.request_as(AnonymousUser())
+        self.assertFalse(request.is_customer)
+        self.assertIsNone(request.customer)
+
+    def test_role_is_cached_across_requests(self):
+        request = self.request_as(self.user)
+        self.assertTrue(request.is_customer)
+        self.assertEqual(request.customer, self.customer)
+        # Only the user itself is loaded
+        with self.assertNumQueries(1):
+            request = self.request_as(self.user)
+        self.assertTrue(request.is_customer)
+        self.assertEqual(request.customer, self.customer)
+
+    def test_group_membership_change_invalidates(self):
+        self.assertTrue(self.request_as(self.user).is_customer)
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.request_as(self.user).is_customer)
+
+    def test_reassigned_profile_invalidates_both_users(self):
+        self.assertEqual(self.request_as(self.user).customer, self.customer)
+        self.assertIsNone(self.request_as(self.other_user).customer)
+        customer = Customer.objects.get(pk=self.customer.pk)
+        customer.user = self.other_user
+        customer.save()
+        self.assertIsNone(self.request_as(self.user).customer)
+        self.assertEqual(self.request_as(self.other_user).customer, customer)
+
+
+class SalesReportChartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='secret')
+        court = Court.objects.create(name='Court 1', hourly_rate=Decimal('10.00'))
+        customer = Customer.objects.create(name='Customer', phone='123')
+        start = timezone.now() - timedelta(days=1)
+        # The rollup the report reads is refreshed on commit
+        with cls.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(
+                customer=customer, court=court, start_time=start,
+                end_time=start + timedelta(hours=1), fee=Decimal('10.00'), status='completed'
+            )
+            Payment.objects.create(booking=booking, amount=Decimal('10.00'), payment_method='cash')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_charts_are_registered(self):
+        with mock.patch('court_management.tasks.render_charts.delay') as delay:
+            response = self.client.get(reverse('sales-report'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.context['daily_chart'])
+        delay.assert_called_once()
+
+    def test_unqueued_charts_fall_back_to_placeholder(self):
+        with mock.patch('court_management.tasks.render_charts.delay', side_effect=OSError('broker down')), \
+                self.assertLogs('court_management.components.services.charts', 'ERROR'):
+            response = self.client.get(reverse('sales-report'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        for chart in ('daily_chart', 'court_chart', 'payment_chart'):
+            self.assertIsNone(response.context[chart])
+
+
+class RevenueRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.court = Court.objects.create(name='Court 1', hourly_rate=Decimal('10.00'))
+        cls.customer = Customer.objects.create(name='Customer', phone='123')
+
+    def setUp(self):
+        self.start = timezone.now() - timedelta(days=1)
+        self.day = timezone.localdate(self.start)
+
+    def rollup(self):
+        return {
+            row.payment_method: row
+            for row in DailyRevenueRollup.objects.filter(date=self.day, court=self.court)
+        }
+
+    def book(self, fee='10.00'):
+        return Booking.objects.create(
+            customer=self.customer, court=self.court, start_time=self.start,
+            end_time=self.start + timedelta(hours=1), fee=Decimal(fee), status='completed'
+        )
+
+    def test_refreshed_once_the_write_commits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book()
+            self.assertEqual(self.rollup(), {})
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(booking=booking, amount=Decimal('10.00'), payment_method='cash')
+        rollup = self.rollup()
+        self.assertEqual(rollup[DailyRevenueRollup.BOOKING_TOTALS].booking_revenue, Decimal('10.00'))
+        self.assertEqual(rollup['cash'].payment_revenue, Decimal('10.00'))
+
+    def test_refresh_updates_existing_rows_in_place(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book()
+        totals = self.rollup()[DailyRevenueRollup.BOOKING_TOTALS]
+        # A refresh that finds the rows already written updates them rather than colliding
+        Booking.objects.filter(court=self.court).update(fee=Decimal('25.00'))
+        self.assertEqual(refresh_revenue_rollup(self.court.pk, self.day), 1)
+        self.assertEqual(refresh_revenue_rollup(self.court.pk, self.day), 1)
+        updated = self.rollup()[DailyRevenueRollup.BOOKING_TOTALS]
+        self.assertEqual(updated.pk, totals.pk)
+        self.assertEqual(updated.booking_revenue, Decimal('25.00'))
+
+    def test_refresh_drops_rows_with_nothing_left(self):
+        DailyRevenueRollup.objects.create(
+            date=self.day, court=self.court, payment_method='card',
+            payments_count=1, payment_revenue=Decimal('5.00'),
+        )
+        self.assertEqual(refresh_revenue_rollup(self.court.pk, self.day), 0)
+        self.assertEqual(self.rollup(), {})
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages, dropping the connection when told to"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 fake ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.split(b':')[0].split()[0].upper().decode()
+            if command == server.drop_at:
+                server.drop_at = None
+                return
+            if command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = b''
+                while not data.endswith(b'\r\n.\r\n'):
+                    data += self.rfile.readline()
+                server.messages.append(data)
+                if server.drop_after_data:
+                    server.drop_after_data = False
+                    return
+                self.reply('250 Queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            elif command in ('EHLO', 'HELO', 'MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            else:
+                self.reply('502 Not implemented')
+
+
+class CustomSMTPBackendTests(SimpleTestCase):
+    def setUp(self):
+        connection_pool.clear()
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeSMTPHandler)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self.server.messages = []
+        self.server.drop_at = None
+        self.server.drop_after_data = False
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(connection_pool.clear)
+
+    def backend(self, fail_silently=False):
+        return CustomSMTPBackend(
+            host='127.0.0.1', port=self.server.server_address[1], username='', password='',
+            use_tls=False, use_ssl=False, timeout=5, fail_silently=fail_silently,
+        )
+
+    def send(self, backend, count=1):
+        messages = [
+            EmailMessage(f'Subject {i}', 'Body', 'from@example.com', ['to@example.com'])
+            for i in range(count)
+        ]
+        return backend.send_messages(messages)
+
+    def test_connection_is_reused_from_the_pool(self):
+        self.assertEqual(self.send(self.backend()), 1)
+        self.assertEqual(self.send(self.backend()), 1)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.messages), 2)
+
+    def test_drop_before_data_reconnects_and_retries(self):
+        self.send(self.backend())
+        pooled = connection_pool._idle[self.backend().pool_key][0][0]
+        self.server.drop_at = 'MAIL'
+        with self.assertLogs('court_management.email_backend', 'WARNING'):
+            self.assertEqual(self.send(self.backend()), 1)
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(len(self.server.messages), 2)
+        # The dropped socket was closed, not returned to the pool
+        self.assertIsNone(pooled.sock)
+        self.assertEqual(len(connection_pool._idle[self.backend().pool_key]), 1)
+
+    def test_drop_before_data_retries_when_failing_silently(self):
+        self.server.drop_at = 'RCPT'
+        with self.assertLogs('court_management.email_backend', 'WARNING'):
+            self.assertEqual(self.send(self.backend(fail_silently=True)), 1)
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_drop_after_data_is_not_retried(self):
+        self.server.drop_after_data = True
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            self.send(self.backend())
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_drop_after_data_failing_silently_sends_the_rest(self):
+        self.server.drop_after_data = True
+        self.assertEqual(self.send(self.backend(fail_silently=True), count=2), 1)
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(self.server.connections, 2)
+
+
+class OutboxTests(TestCase):
+    def test_identical_emails_are_deduplicated_within_the_window(self):
+        now = timezone.now()
+        _, created = enqueue_email('Reminder', 'Body', ['to@example.com'])
+        self.assertTrue(created)
+        _, created = enqueue_email('Reminder', 'Body', ['to@example.com'])
+        self.assertFalse(created)
+        later = now + timedelta(seconds=settings.OUTBOX_DEDUPE_WINDOW)
+        with mock.patch('court_management.components.services.outbox.timezone.now', return_value=later):
+            _, created = enqueue_email('Reminder', 'Body', ['to@example.com'])
+        self.assertTrue(created)
+
+    def test_explicit_key_is_never_sent_twice(self):
+        enqueue_email('Welcome', 'Body', ['to@example.com'], idempotency_key='welcome:1')
+        _, created = enqueue_email('Welcome', 'Other body', ['to@example.com'], idempotency_key='welcome:1')
+        self.assertFalse(created)
+
+    def test_broker_outage_does_not_fail_the_request(self):
+        with mock.patch('court_management.tasks.deliver_outbound_emails.delay', side_effect=OSError('broker down')), \
+                self.assertLogs('court_management.components.services.outbox', 'WARNING'), \
+                self.captureOnCommitCallbacks(execute=True):
+            _, created = enqueue_email('Welcome', 'Body', ['to@example.com'])
+        self.assertTrue(created)
+        self.assertEqual(OutboundEmail.objects.get().status, 'pending')
+
+    def test_partial_failure_sends_nothing_twice(self):
+        for subject in ('First', 'Broken', 'Third'):
+            enqueue_email(subject, 'Body', ['to@example.com'])
+        delivered = []
+
+        def send_messages(messages):
+            # Claimed and leased before anything is sent
+            self.assertFalse(OutboundEmail.objects.filter(next_attempt_at__lte=timezone.now()).exists())
+            if messages[0].subject == 'Broken':
+                raise smtplib.SMTPException('rejected')
+            delivered.extend(message.subject for message in messages)
+            return len(messages)
+
+        connection = mock.Mock(send_messages=send_messages)
+        with mock.patch('court_management.components.services.outbox.get_connection', return_value=connection), \
+                self.assertLogs('court_management.components.services.outbox', 'WARNING'):
+            self.assertEqual(deliver_pending_emails(10), 3)
+            # Nothing is due again until the failed email's backoff passes
+            self.assertEqual(deliver_pending_emails(10), 0)
+
+        self.assertEqual(delivered, ['First', 'Third'])
+        statuses = dict(OutboundEmail.objects.values_list('subject', 'status'))
+        self.assertEqual(statuses, {'First': 'sent', 'Broken': 'pending', 'Third': 'sent'})
+        broken = OutboundEmail.objects.get(subject='Broken')
+        self.assertEqual(broken.attempts, 1)
+        self.assertEqual(broken.last_error, 'rejected')
+        self.assertGreater(broken.next_attempt_at, timezone.now())
+
+    def test_expired_lease_is_claimed_again(self):
+        email, _ = enqueue_email('Lost', 'Body', ['to@example.com'])
+        # A worker claimed it and died before recording the result
+        OutboundEmail.objects.filter(pk=email.pk).update(attempts=1, next_attempt_at=timezone.now() - timedelta(seconds=1))
+        connection = mock.Mock(send_messages=mock.Mock(return_value=1))
+        with mock.patch('court_management.components.services.outbox.get_connection', return_value=connection):
+            self.assertEqual(deliver_pending_emails(10), 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sent', 2))
+
+
+class BookingTransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.court = Court.objects.create(name='Court 1', hourly_rate=Decimal('10.00'))
+        cls.customer = Customer.objects.create(name='Customer', phone='123')
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def book(self, start, hours=1, status='confirmed'):
+        # Created through the queryset so no transition is scheduled by the save signals
+        booking = Booking(
+            customer=self.customer, court=self.court, start_time=start,
+            end_time=start + timedelta(hours=hours), fee=Decimal('10.00'), status=status,
+        )
+        Booking.objects.bulk_create([booking])
+        return Booking.objects.get(court=self.court, start_time=start)
+
+    def test_each_transition_time_is_scheduled_once(self):
+        booking = self.book(self.now + timedelta(minutes=10), hours=0.25)
+        with mock.patch('court_management.tasks.transition_booking_status.apply_async') as apply_async:
+            self.assertEqual(schedule_booking_transitions(booking), 1)
+            self.assertEqual(schedule_booking_transitions(booking), 0)
+            # Moving the booking schedules its new start
+            booking.start_time += timedelta(minutes=5)
+            self.assertEqual(schedule_booking_transitions(booking), 1)
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertEqual(apply_async.call_args.args[0], (booking.pk, 'in_progress', _stamp(booking.start_time)))
+
+    def test_stale_stamp_is_ignored(self):
+        booking = self.book(self.now - timedelta(minutes=10))
+        self.assertFalse(apply_booking_transition(booking.pk, 'in_progress', _stamp(booking.start_time - timedelta(hours=1))))
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertTrue(apply_booking_transition(booking.pk, 'in_progress', _stamp(booking.start_time)))
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'in_progress')
+
+    def test_early_run_does_nothing(self):
+        booking = self.book(self.now + timedelta(minutes=10))
+        self.assertFalse(apply_booking_transition(booking.pk, 'in_progress', _stamp(booking.start_time)))
+
+    def test_confirmed_booking_whose_slot_passed_stays_confirmed(self):
+        booking = self.book(self.now - timedelta(hours=2))
+        self.assertFalse(apply_booking_transition(booking.pk, 'in_progress'))
+        self.assertFalse(apply_booking_transition(booking.pk, 'completed'))
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+
+    def test_sweep_applies_missed_transitions_however_old(self):
+        started = self.book(self.now - timedelta(minutes=10))
+        finished = self.book(self.now - timedelta(days=3), status='in_progress')
+        with mock.patch('court_management.tasks.transition_booking_status.apply_async'):
+            self.assertEqual(sweep_booking_transitions(settings.BOOKING_TRANSITION_SWEEP_WINDOW), 2)
+        started.refresh_from_db()
+        finished.refresh_from_db()
+        self.assertEqual((started.status, finished.status), ('in_progress', 'completed'))
+
+
+class DailyReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Employee.objects.create(
+            name='Manager', position='manager', phone='123', email='manager@example.com',
+            hire_date=timezone.localdate(), hourly_rate=Decimal('10.00'),
+        )
+        court = Court.objects.create(name='Court 1', hourly_rate=Decimal('10.00'))
+        customer = Customer.objects.create(name='Customer', phone='123')
+        today = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+        Booking.objects.bulk_create([
+            Booking(
+                customer=customer, court=court, start_time=start,
+                end_time=start + timedelta(hours=1), fee=Decimal(fee), status=status,
+            )
+            for start, fee, status in (
+                (today, '12.50', 'completed'),
+                (today + timedelta(hours=2), '20.00', 'confirmed'),
+                (today + timedelta(days=1), '15.00', 'confirmed'),
+            )
+        ])
+        refresh_revenue_rollup(court.pk, timezone.localdate())
+
+    def test_text_and_html_parts_agree(self):
+        self.assertEqual(send_daily_report(), 1)
+        message, = mail.outbox
+        html, _ = message.alternatives[0]
+        for figure in ("Today's Bookings: 2", 'Completed Bookings: 1', 'Total Revenue: $32.50', "Tomorrow's Bookings: 1"):
+            self.assertIn(figure, message.body)
+        for figure in ('>2<', '>1<', '>$32.50<', 'Court 1'):
+            self.assertIn(figure, html)
+        self.assertIn('Court 1: 2 bookings, $32.50', message.body)
+
+    def test_headline_figures_are_read_from_the_bookings(self):
+        # A booking the rollup has not caught up with yet still counts
+        booking = Booking.objects.first()
+        Booking.objects.bulk_create([Booking(
+            customer=booking.customer, court=booking.court, start_time=booking.start_time + timedelta(hours=4),
+            end_time=booking.start_time + timedelta(hours=5), fee=Decimal('7.50'), status='confirmed',
+        )])
+        with CaptureQueriesContext(connection) as queries:
+            send_daily_report()
+        self.assertIn("Today's Bookings: 3", mail.outbox[0].body)
+        self.assertIn('Total Revenue: $40.00', mail.outbox[0].body)
+        self.assertEqual(
+            len([query for query in queries.captured_queries if 'court_management_booking' in query['sql']]), 1
+        )
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = TwoTierCache('', {'OPTIONS': {
+            'FRONT': 'local', 'BACK': 'shared', 'FRONT_TIMEOUT': 5,
+            'SHARED_KEY_PREFIXES': ('shared-only:',), 'BACK_RETRY_INTERVAL': 5,
+        }})
+        self.front, self.back = caches['local'], caches['shared']
+        self.front.clear()
+        self.back.clear()
+        self.addCleanup(self.front.clear)
+        self.addCleanup(self.back.clear)
+
+    def back_down(self):
+        return mock.patch.object(self.back, 'get', side_effect=ConnectionError('shared tier down'))
+
+    def test_reads_are_copied_to_the_front_tier(self):
+        self.back.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.front.get('key'), 'value')
+
+    def test_shared_prefixes_skip_the_front_tier(self):
+        self.cache.set('shared-only:key', 1)
+        self.assertEqual(self.cache.get('shared-only:key'), 1)
+        self.assertIsNone(self.front.get('shared-only:key'))
+        self.assertEqual(self.cache.incr('shared-only:key'), 2)
+        self.assertEqual(self.back.get('shared-only:key'), 2)
+
+    def test_writes_and_deletes_reach_both_tiers(self):
+        self.cache.set('key', 'value')
+        self.assertEqual((self.front.get('key'), self.back.get('key')), ('value', 'value'))
+        self.cache.delete('key')
+        self.assertEqual((self.front.get('key'), self.back.get('key')), (None, None))
+
+    def test_falls_back_to_the_front_tier_while_the_shared_tier_is_down(self):
+        self.cache.set('key', 'value')
+        with self.back_down() as get, self.assertLogs('badminton_court.cache', 'WARNING'):
+            self.assertEqual(self.cache.get('key'), 'value')
+            self.front.delete('key')
+            self.assertIsNone(self.cache.get('key'))
+            self.cache.set('shared-only:key', 1)
+            self.assertEqual(self.cache.get('shared-only:key'), 1)
+        # Not retried until BACK_RETRY_INTERVAL passes
+        self.assertEqual(get.call_count, 1)
+        self.assertIsNone(self.back.get('shared-only:key'))
+
+    def test_shared_tier_is_retried_after_the_interval(self):
+        with self.back_down(), self.assertLogs('badminton_court.cache', 'WARNING'):
+            self.assertIsNone(self.cache.get('key'))
+        self.back.set('key', 'value')
+        with mock.patch('badminton_court.cache.time.monotonic', return_value=time.monotonic() + 10):
+            self.assertEqual(self.cache.get('key'), 'value')
+
+
+class TaskLockTests(SimpleTestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.addCleanup(caches['shared'].clear)
+
+    def test_lock_is_held_in_the_shared_tier(self):
+        with task_lock('job', 60) as acquired:
+            self.assertTrue(acquired)
+            self.assertTrue(caches['shared'].has_key('task-lock:job'))
+            with task_lock('job', 60) as again:
+                self.assertFalse(again)
+        self.assertFalse(caches['shared'].has_key('task-lock:job'))
+
+    def test_a_lock_taken_over_after_expiry_is_left_alone(self):
+        with task_lock('job', 60):
+            caches['shared'].set('task-lock:job', 'another run')
+        self.assertEqual(caches['shared'].get('task-lock:job'), 'another run')
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db', SESSION_CLEANUP_BATCH_SIZE=2,
+)
+class ClearExpiredSessionsTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1)) for i in range(5)]
+            + [Session(session_key=f'live{i}', session_data='', expire_date=now + timedelta(days=1)) for i in range(2)]
+        )
+
+    def test_expired_sessions_are_deleted_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(clear_expired_sessions(), 5)
+        deletes = [query for query in queries.captured_queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(
+            sorted(Session.objects.values_list('session_key', flat=True)), ['live0', 'live1']
+        )
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_stores_without_a_table_are_skipped(self):
+        self.assertEqual(clear_expired_sessions(), 0)
+        self.assertEqual(Session.objects.count(), 7)
+
+
+@override_settings(SESSION_ENGINE='badminton_court.sessions')
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        self.shared = caches['shared']
+        patcher = mock.patch('badminton_court.sessions._cache_down_until', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = SessionStore()
+        self.store['user'] = 'alice'
+        self.store.save()
+
+    def cache_down(self):
+        error = ConnectionError('shared cache down')
+        return mock.patch.multiple(
+            self.shared, **{method: mock.Mock(side_effect=error) for method in ('get', 'set', 'delete', 'has_key')}
+        )
+
+    def test_sessions_are_read_from_the_database_while_the_cache_is_down(self):
+        self.shared.clear()
+        with self.cache_down(), self.assertLogs('badminton_court.sessions', 'WARNING'):
+            self.assertEqual(SessionStore(self.store.session_key)['user'], 'alice')
+            self.assertTrue(SessionStore().exists(self.store.session_key))
+
+    def test_logout_while_the_cache_is_down_deletes_the_session(self):
+        with self.cache_down(), self.assertLogs('badminton_court.sessions', 'WARNING'):
+            self.store.flush()
+        self.assertFalse(Session.objects.exists())
+
+    def test_the_cache_is_skipped_until_the_retry_interval(self):
+        with self.cache_down(), self.assertLogs('badminton_court.sessions', 'WARNING'):
+            SessionStore(self.store.session_key).load()
+            SessionStore(self.store.session_key).load()
+            self.assertEqual(self.shared.get.call_count, 1)
+
+    def test_cached_sessions_expire_after_the_max_age(self):
+        with mock.patch.object(self.shared, 'set') as cache_set:
+            self.store.save()
+        self.assertEqual(cache_set.call_args.args[2], settings.SESSION_CACHE_MAX_AGE)
+
+
+class SessionEngineDefaultTests(SimpleTestCase):
+    def test_the_database_engine_is_the_default_without_redis(self):
+        self.assertFalse(settings.CACHE_USES_REDIS)
+        self.assertEqual(settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db')
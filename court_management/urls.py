@@ -34,6 +34,8 @@ urlpatterns = [
     path('courts/create/', views.CourtCreateView.as_view(), name='court-create'),
     path('courts/<int:pk>/update/', views.CourtUpdateView.as_view(), name='court-update'),
     path('courts/<int:pk>/delete/', views.CourtDeleteView.as_view(), name='court-delete'),
+    path('courts/availability/', views.court_availability, name='court-availability'),
+    path('api/courts/availability/', views.court_availability_api, name='court-availability-api'),
     
     # Employee URLs
     path('employees/', views.EmployeeListView.as_view(), name='employee-list'),
@@ -49,8 +51,10 @@ urlpatterns = [
     # Report URLs
     path('reports/sales/', views.sales_report, name='sales-report'),
     path('reports/sales/export/', views.export_sales_report_csv, name='export-sales-report'),
+    path('reports/charts/<slug:key>.<slug:fmt>', views.report_chart, name='report-chart'),
     path('reports/payroll/', views.payroll_report, name='payroll-report'),
     path('reports/payroll/<int:year>/<int:month>/', views.payroll_report, name='payroll-report-month'),
+    path('reports/payroll/<int:year>/<int:month>/employees/<int:pk>/entries/', views.payroll_time_entries, name='payroll-time-entries'),
     
     # Test Template
     path('test-template/', views.test_template, name='test-template'),
@@ -5,9 +5,11 @@ from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
 from django.template.loader import get_template
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 # Import models from the models package
 from .components.models import Customer, Court, Booking, Employee
+from .components.services import get_dashboard_stats, day_range, range_lookup
 
 User = get_user_model()
 
@@ -18,54 +20,47 @@ User = get_user_model()
 @login_required
 def index(request):
     # Get today's bookings
-    today = timezone.now().date()
+    today_range = range_lookup('start_time', day_range(timezone.localdate()))
     
     # Check if user is a customer
-    is_customer = request.user.groups.filter(name='Customers').exists()
+    is_customer = request.is_customer
     
     # Filter bookings based on user role
     if is_customer:
-        try:
-            customer = Customer.objects.get(user=request.user)
+        if request.customer is not None:
             today_bookings = Booking.objects.filter(
-                start_time__date=today, 
-                customer=customer
+                customer=request.customer,
+                **today_range
             ).order_by('start_time')
-        except Customer.DoesNotExist:
+        else:
             today_bookings = Booking.objects.none()
     else:
-        today_bookings = Booking.objects.filter(start_time__date=today).order_by('start_time')
+        today_bookings = Booking.objects.filter(**today_range).order_by('start_time')
+    today_bookings = today_bookings.select_related('customer', 'court')
+    
+    # Court, customer and employee counts plus recent activity come from cache
+    stats = get_dashboard_stats()
     
     # Get active courts
-    active_courts = Court.objects.filter(active=True).count()
+    active_courts = stats['active_courts']
     
     # Get total customers
     if request.user.has_perm('court_management.view_all_customers'):
-        total_customers = Customer.objects.filter(active=True).count()
+        total_customers = stats['total_customers']
     else:
         total_customers = 0
     
     # Get active employees
     if request.user.has_perm('court_management.view_all_employees'):
-        active_employees = Employee.objects.filter(active=True).count()
+        active_employees = stats['active_employees']
     else:
         active_employees = 0
     
     # Get recent activities (last 5 bookings)
     if request.user.has_perm('court_management.view_all_bookings'):
-        recent_bookings = Booking.objects.order_by('-created_at')[:5]
+        recent_activities = stats['recent_activities']
     else:
-        recent_bookings = Booking.objects.none()
-    
-    # Format recent activities for display
-    recent_activities = []
-    for booking in recent_bookings:
-        activity = {
-            'title': f"New booking by {booking.customer.name}",
-            'description': f"Court {booking.court.name} at {booking.start_time.strftime('%Y-%m-%d %H:%M')}",
-            'timestamp': booking.created_at
-        }
-        recent_activities.append(activity)
+        recent_activities = []
     
     context = {
         'today_bookings': today_bookings,
@@ -0,0 +1,49 @@
+# gunicorn.conf.py
+"""
+Gunicorn configuration for the web container.
+
+Gunicorn reads this file from the working directory. Every setting can be
+overridden from the environment. The default worker serves
+badminton_court.wsgi with threads. To serve badminton_court.asgi instead,
+set GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker and pass
+badminton_court.asgi:application.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Throughput scales with cores: (2 x cores) + 1 worker processes by default
+workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Load the application once in the master so workers fork with Django already
+# imported and share its memory pages; reload (development only) needs it off
+reload = os.getenv('GUNICORN_RELOAD', 'false').lower() == 'true'
+preload_app = not reload
+
+# Recycle each worker after a jittered number of requests to bound slow leaks
+# without restarting every worker at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+# Seconds a silent worker is given before it is killed, and seconds in-flight
+# requests are given to finish on restart or shutdown
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Heartbeat files on tmpfs so a slow disk cannot stall workers
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading must not be shared across workers
+    from django.db import connections
+    connections.close_all()
@@ -9,6 +9,10 @@ import sys
 def main():
     """Run administrative tasks."""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'badminton_court.settings')
+    # Settings key test behaviour (eager Celery tasks, in-process caches, the
+    # testserver host) off RUNNING_TESTS, so `manage.py test` needs no extra env
+    if len(sys.argv) > 1 and sys.argv[1] == 'test':
+        os.environ.setdefault('RUNNING_TESTS', 'true')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc: